@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import timeit
+from collections import deque
+from datetime import datetime, timedelta
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dashboard'))
+from store import RingStore  # noqa: E402
+
+print("""dashboard-chart.py - Time the dashboard chart path per update.
+
+Compares the original per-series deques, which rebuilt every series as a list
+and found axis ranges with min() and max() on every update, against the
+RingStore path: a full, downsampled figure on page load, then per update only
+the new row. The charts autorange in the browser, so no axis ranges are found.
+
+Times are for all 8 charts (13 series), excluding plotly and JSON encoding.
+
+""")
+
+CHARTS = (('Temperature',), ('Humidity',), ('Pressure',), ('Light',), ('RED', 'NH3'), ('OX',),
+          ('0.3 - 0.5 um', '0.5 - 1.0 um'), ('1.0 - 2.5  um', '2.5 - 5.0  um', '5.0 - 10.0 um', '>10.0 um'))
+COLUMNS = [name for chart in CHARTS for name in chart]
+CHART_POINTS = 1000
+
+
+def fill(num_points):
+    start = datetime(2020, 1, 1)
+    X = deque(maxlen=num_points)
+    series = dict((name, deque(maxlen=num_points)) for name in COLUMNS)
+    store = RingStore(COLUMNS, num_points)
+    for i in range(num_points):
+        values = dict((name, None if i % 97 == 0 else float(numpy.sin(i / 100.0 + n)))
+                      for n, name in enumerate(COLUMNS))
+        X.append(start + timedelta(seconds=20 * i))
+        store.append(i * 20.0, values)
+        for name in COLUMNS:
+            series[name].append(values[name])
+    return X, series, store
+
+
+def deque_update(X, series):
+    for chart in CHARTS:
+        data = [(list(X), list(series[name])) for name in chart]
+        Y_all = [y for name in chart for y in series[name] if y is not None]
+        (min(X), max(X), min(Y_all), max(Y_all), data)
+
+
+def store_full(store):
+    # Full figures are cached between appends, clear the cache to time a fresh build
+    store._downsampled.clear()
+    for chart in CHARTS:
+        for name in chart:
+            times, values = store.downsample(name, CHART_POINTS)
+            (times * 1000).astype('datetime64[ms]')
+
+
+def store_update(store):
+    for chart in CHARTS:
+        (store.times()[-1:] * 1000).astype('datetime64[ms]')
+        for name in chart:
+            store.column(name)[-1:]
+
+
+def append(store, values):
+    store.append(store.count * 20.0, values)
+
+
+def milliseconds(function, *args):
+    number = 20
+    return min(timeit.repeat(lambda: function(*args), number=number, repeat=5)) / number * 1000
+
+
+for num_points in (4320, 30240):
+    X, series, store = fill(num_points)
+    print("{} points per series ({:.0f}h at 20 seconds per point)".format(num_points, num_points / 180.0))
+    print("  deques, every update:        {:8.3f}ms".format(milliseconds(deque_update, X, series)))
+    print("  store, append a row:         {:8.3f}ms".format(milliseconds(append, store, dict((name, 1.0) for name in COLUMNS))))
+    print("  store, full figures:         {:8.3f}ms".format(milliseconds(store_full, store)))
+    print("  store, every update:         {:8.3f}ms".format(milliseconds(store_update, store)))
+    print("")
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+import sys
+import timeit
+import numpy
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+# Only the analysis path is benchmarked, so no audio device is needed
+sys.modules.setdefault('sounddevice', mock.Mock())
+from enviroplus.noise import Noise  # noqa: E402
+
+print("""noise-fft-size.py - Compare Noise analysis cost for each FFT size.
+
+Times Noise.analyse() on a synthetic capture for the default (1 second,
+zero-padded), 'pow2' and 'native' FFT sizes. Run on the target device,
+eg a Raspberry Pi Zero, to see the real speedup.
+
+""")
+
+SAMPLE_RATE = 16000
+DURATION = 0.5
+REPEAT = 5
+NUMBER = 20
+
+capture = numpy.random.uniform(-1.0, 1.0, (int(SAMPLE_RATE * DURATION), 1))
+baseline = None
+
+for fft_size in (None, 'pow2', 'native'):
+    noise = Noise(sample_rate=SAMPLE_RATE, duration=DURATION, fft_size=fft_size)
+    noise._record = lambda: capture
+
+    def measure():
+        noise.analyse().get_noise_profile()
+
+    best = min(timeit.repeat(measure, repeat=REPEAT, number=NUMBER)) / NUMBER
+    if baseline is None:
+        baseline = best
+
+    print("{:>8} {:6d} points: {:8.3f}ms per measurement ({:.1f}x)".format(
+        str(fft_size), noise.fft_size, best * 1000, baseline / best))
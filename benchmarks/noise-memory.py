@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import sys
+import time
+import tracemalloc
+import numpy
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+# Recording is replaced with a synthetic capture, so no audio device is needed
+sys.modules.setdefault('sounddevice', mock.Mock())
+from enviroplus import noise as noise_module  # noqa: E402
+
+print("""noise-memory.py - Compare Noise memory use for each capture format.
+
+Reports the peak memory allocated, and the time taken, per measurement
+(capture plus noise profile) for 'float64', 'float32' and 'int16' capture.
+Run on the target device, eg a Raspberry Pi Zero, for real timings.
+
+In the low-footprint modes everything except NumPy's own FFT scratch space
+is preallocated, so the peak is almost entirely that scratch space.
+
+""")
+
+SAMPLE_RATE = 16000
+DURATION = 0.5
+MEASUREMENTS = 20
+
+capture = numpy.random.uniform(-1.0, 1.0, (int(SAMPLE_RATE * DURATION), 1))
+
+
+def rec(frames=None, samplerate=None, channels=None, dtype=None, out=None, blocking=False):
+    if out is None:
+        return capture.astype(dtype)
+    if out.dtype == numpy.int16:
+        numpy.multiply(capture, 32767, out=out, casting='unsafe')
+    else:
+        numpy.copyto(out, capture, casting='same_kind')
+    return out
+
+
+noise_module.sounddevice.rec = rec
+
+for estimator in ('fft', 'welch'):
+    for dtype in ('float64', 'float32', 'int16'):
+        noise = noise_module.Noise(sample_rate=SAMPLE_RATE, duration=DURATION, estimator=estimator, dtype=dtype)
+        noise.get_noise_profile()
+
+        peaks = []
+        t_start = time.time()
+        for _ in range(MEASUREMENTS):
+            tracemalloc.start()
+            noise.get_noise_profile()
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        elapsed = (time.time() - t_start) / MEASUREMENTS
+
+        print("{:>5} {:>7}: {:8.1f}KiB peak allocated, {:6.2f}ms per measurement".format(
+            estimator, dtype, max(peaks) / 1024.0, elapsed * 1000))
@@ -9,20 +9,24 @@
 # ------------------------------------------------------------------------------------------ IMPORTS
 # Plotly imports
 import dash
-from dash.dependencies import Output, Input
+from dash.dependencies import Output, Input, State
+from dash.exceptions import PreventUpdate
 import dash_core_components as dcc
 import dash_html_components as html
 import plotly
 import plotly.graph_objs as go
 
 # Python imports
+import os
 import random
+import threading
 from collections import deque
 import time
 from datetime import datetime
 
 # Other imports
 import pandas as pd # import to fix bug in plotly
+from store import RingStore, chart_update, chart_max_points
 
 # --------------------------------------------------------------------------------------------------
 # ------------------------------------------------------------------------------- APP INITIALIZATION
@@ -67,40 +71,56 @@ frequency = 20 # seconds
 # Number of data points to store
 num_points = 4320 # 24hrs @ 20 sec / point
 
+# Maximum number of points per series to send to a chart, longer histories are downsampled
+chart_points = 1000
+
+# Number of new points a downsampled chart is extended by before it is sent again in full
+chart_refresh = 90 # 30 mins @ 20 sec / point
+
+# Run the Dash development server in debug mode
+debug = True
+
 # --------------------------------------------------------------------------------------------------
 # ------------------------------------------------------------------------------ DATA INITIALIZATION
-X             = deque(maxlen=num_points)
-
 cpu_temps     = deque(maxlen=5)
 Y_temperature = {'title': 'Temperature',
 				 'units': 'C',
-				 'values': {'Temperature':     deque(maxlen=num_points)}}
+				 'values': ('Temperature',)}
 Y_humidity    = {'title': 'Humidity',
 				 'units': '%',
-				 'values': {'Humidity':        deque(maxlen=num_points)}}
+				 'values': ('Humidity',)}
 Y_pressure    = {'title': 'Pressure',
 				 'units': 'mBar',
-				 'values': {'Pressure':        deque(maxlen=num_points)}}
+				 'values': ('Pressure',)}
 Y_light       = {'title': 'Light',
 				 'units': 'Lux',
-				 'values': {'Light':           deque(maxlen=num_points)}}
+				 'values': ('Light',)}
 Y_gas_red_nh3 = {'title': 'Reducing and NH3 gases',
 				 'units': 'kΩ',
-				 'values': {'RED':             deque(maxlen=num_points),
-				 			'NH3':             deque(maxlen=num_points)}}
+				 'values': ('RED',
+							'NH3')}
 Y_gas_oxi     = {'title': 'Oxidising gases',
 				 'units': 'kΩ',
-				 'values': {'OX':              deque(maxlen=num_points)}}
+				 'values': ('OX',)}
 Y_pms_small   = {'title': 'Particulate matters (small)',
 				 'units': 'per 0.1L of air',
-				 'values': {'0.3 - 0.5 um':    deque(maxlen=num_points),
-							'0.5 - 1.0 um':    deque(maxlen=num_points)}}
+				 'values': ('0.3 - 0.5 um',
+							'0.5 - 1.0 um')}
 Y_pms_large   = {'title': 'Particulate matters (large)',
 				 'units': 'per 0.1L of air',
-				 'values': {'1.0 - 2.5  um':   deque(maxlen=num_points),
-							'2.5 - 5.0  um':   deque(maxlen=num_points),
-							'5.0 - 10.0 um':   deque(maxlen=num_points),
-							'>10.0 um':        deque(maxlen=num_points)}}
+				 'values': ('1.0 - 2.5  um',
+							'2.5 - 5.0  um',
+							'5.0 - 10.0 um',
+							'>10.0 um')}
+
+# One preallocated ring buffer holds the timestamps and every series
+charts = (Y_temperature, Y_humidity, Y_pressure, Y_light, Y_gas_red_nh3, Y_gas_oxi, Y_pms_small, Y_pms_large)
+graphs = ('graph-temperature', 'graph-humidity', 'graph-pressure', 'graph-light',
+		  'graph-gases-red-nh3', 'graph-gases-ox', 'graph-particulates-small', 'graph-particulates-large')
+store  = RingStore([name for Y in charts for name in Y['values']], num_points)
+
+# Held while the collector appends and while callbacks copy values out
+data_lock = threading.Lock()
 
 
 # --------------------------------------------------------------------------------------------------
@@ -124,11 +144,11 @@ app.layout = html.Div([
 	),
     html.Div([
 	    html.Div(
-	        [dcc.Graph(id='graph-temperature', animate=True)],
+	        [dcc.Graph(id='graph-temperature')],
 	        className="chart_container six columns",
 	    ),
 	    html.Div(
-	        [dcc.Graph(id='graph-humidity', animate=True)],
+	        [dcc.Graph(id='graph-humidity')],
 	        className="chart_container six columns",
 	    )],
 		className="row flex-display",
@@ -136,11 +156,11 @@ app.layout = html.Div([
 
     html.Div([
 	    html.Div(
-	        [dcc.Graph(id='graph-pressure', animate=True)],
+	        [dcc.Graph(id='graph-pressure')],
 	        className="chart_container six columns",
 	    ),
 	    html.Div(
-	        [dcc.Graph(id='graph-light', animate=True)],
+	        [dcc.Graph(id='graph-light')],
 	        className="chart_container six columns",
 	    )],
 		className="row flex-display",
@@ -148,11 +168,11 @@ app.layout = html.Div([
 
     html.Div([
 	    html.Div(
-	        [dcc.Graph(id='graph-gases-red-nh3', animate=True)],
+	        [dcc.Graph(id='graph-gases-red-nh3')],
 	        className="chart_container six columns",
 	    ),
 	    html.Div(
-	        [dcc.Graph(id='graph-gases-ox', animate=True)],
+	        [dcc.Graph(id='graph-gases-ox')],
 	        className="chart_container six columns",
 	    )],
 		className="row flex-display",
@@ -160,29 +180,30 @@ app.layout = html.Div([
 
     html.Div([
 	    html.Div(
-	        [dcc.Graph(id='graph-particulates-small', animate=True)],
+	        [dcc.Graph(id='graph-particulates-small')],
 	        className="chart_container six columns",
 	    ),
 	    html.Div(
-	        [dcc.Graph(id='graph-particulates-large', animate=True)],
+	        [dcc.Graph(id='graph-particulates-large')],
 	        className="chart_container six columns",
 	    )],
 		className="row flex-display",
     ),
 
 	dcc.Interval(id='graph-update', interval=frequency*1000),
+	# Store generation, row count and row count of the last full figures this page has been sent
+	dcc.Store(id='graph-position'),
 
 ], id="mainContainer", style={"display": "flex", "flex-direction": "column"})
 
 # --------------------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------- UTILITY FUNCTIONS
-def unpack_values(Y):
-	unpacked = []
-	for name, values in Y['values'].items():
-		for y in values:
-			if y is not None:
-				unpacked.append(y)
-	return unpacked
+def local_time():
+	# Seconds since the epoch in local time, so the charts show local times
+	return (datetime.now() - datetime(1970, 1, 1)).total_seconds()
+
+def to_datetimes(times):
+	return (times * 1000).astype('datetime64[ms]')
 
 # --------------------------------------------------------------------------------------------------
 # ------------------------------------------------------------------------------------- RESET BUTTON
@@ -191,50 +212,70 @@ def unpack_values(Y):
 def reset_data(n_clicks):
 	# On page reloads, n_clicks will be None
 	if n_clicks is not None:
-		X.clear()
-		Y_temperature['values']['Temperature'].clear()
-		Y_humidity['values']['Humidity'].clear()
-		Y_pressure['values']['Pressure'].clear()
-		Y_light['values']['Light'].clear()
-		Y_gas_red_nh3['values']['RED'].clear()
-		Y_gas_red_nh3['values']['NH3'].clear()
-		Y_gas_oxi['values']['OX'].clear()
-		Y_pms_small['values']['0.3 - 0.5 um'].clear()
-		Y_pms_small['values']['0.5 - 1.0 um'].clear()
-		Y_pms_large['values']['1.0 - 2.5  um'].clear()
-		Y_pms_large['values']['2.5 - 5.0  um'].clear()
-		Y_pms_large['values']['5.0 - 10.0 um'].clear()
-		Y_pms_large['values']['>10.0 um'].clear()
+		with data_lock:
+			store.clear()
 	return ''
 
 # --------------------------------------------------------------------------------------------------
 # ------------------------------------------------------------------------------------ CHART UPDATES
 def create_scatter(X, name, values):
 	return plotly.graph_objs.Scatter(
-				x           = list(X),
-				y           = list(values),
+				x           = X,
+				y           = values,
 				name        = name,
 				mode        = 'lines',
 				connectgaps = False,
 				)
 
-def update_graph(X, Y):
-	chart = {'data': [create_scatter(X, name, values) for name, values in Y['values'].items()]}
-	Y_all = unpack_values(Y)
-	if (len(X) > 0) and (len(Y_all) > 0):
-		chart['layout'] = go.Layout(title=Y['title'],
-									yaxis_title=Y['units'],
-									xaxis=dict(range=[min(X),     max(X)]),
-									yaxis=dict(range=[min(Y_all), max(Y_all)]))
-	return chart
+def update_graph(Y):
+	# Axes autorange in the browser, so they follow the points added by extend_graph
+	data = []
+	for name in Y['values']:
+		X, values = store.downsample(name, chart_points)
+		data.append(create_scatter(to_datetimes(X), name, values))
+	return {'data': data, 'layout': go.Layout(title=Y['title'], yaxis_title=Y['units'])}
+
+def extend_graph(Y, rows):
+	# extendData takes the new points for each trace, the trace indices and the number of points to keep
+	X = to_datetimes(store.times()[-rows:])
+	return (dict(x=[X] * len(Y['values']),
+				 y=[store.column(name)[-rows:] for name in Y['values']]),
+			list(range(len(Y['values']))),
+			chart_max_points(store.size, chart_points, chart_refresh))
 
 # Time axis
 @app.callback(Output('counter', 'children'),
 			  [Input('graph-update', 'n_intervals')])
 def update_time(input_data):
-	X.append(datetime.now())
-	return 'Most recent update: {}'.format(X[-1])
-	
+	with data_lock:
+		if len(store) == 0:
+			return 'Waiting for the first update'
+		return 'Most recent update: {}'.format(to_datetimes(store.times()[-1:])[0])
+
+# All charts, full figures when the page loads, after a reset or periodically once downsampled, otherwise
+# only the new points
+@app.callback([Output(graph, 'figure')     for graph in graphs] +
+			  [Output(graph, 'extendData') for graph in graphs] +
+			  [Output('graph-position', 'data')],
+			  [Input('graph-update', 'n_intervals')],
+			  [State('graph-position', 'data')])
+def update_graphs(input_data, position):
+	with data_lock:
+		rows, position = chart_update(position, store.generation, store.count, store.size,
+									  chart_points, chart_refresh)
+		if rows is None:
+			figures = [update_graph(Y) for Y in charts]
+			return figures + [dash.no_update] * len(graphs) + [position]
+		if rows == 0:
+			raise PreventUpdate
+		extends = [extend_graph(Y, rows) for Y in charts]
+		return [dash.no_update] * len(graphs) + extends + [position]
+
+# --------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------- DATA COLLECTION
+# Sensors are read here, on one schedule, no matter how many browser tabs are open.
+# The chart callbacks above only read the collected values.
+
 # Temperature
 def get_cpu_temperature():
 	with open("/sys/class/thermal/thermal_zone0/temp", "r") as f:
@@ -242,77 +283,49 @@ def get_cpu_temperature():
 		temp = int(temp) / 1000.0
 	return temp
 
-@app.callback(Output('graph-temperature', 'figure'),
-			  [Input('graph-update', 'n_intervals')])
-def update_graph_temperature(input_data):
+def read_temperature():
 	try:
 		factor       = 2.25
 		cpu_temps.append(get_cpu_temperature())
 		avg_cpu_temp = sum(cpu_temps) / float(len(cpu_temps))
 		raw_temp     = bme280.get_temperature()
-		value        = raw_temp - ((avg_cpu_temp - raw_temp) / factor)
+		return raw_temp - ((avg_cpu_temp - raw_temp) / factor)
 	except:
-		value = None
-	Y_temperature['values']['Temperature'].append(value)
-	return update_graph(X, Y_temperature)
+		return None
 
 # Humidity
-@app.callback(Output('graph-humidity', 'figure'),
-			  [Input('graph-update', 'n_intervals')])
-def update_graph_temperature(input_data):
+def read_humidity():
 	try:
-		value = bme280.get_humidity()
+		return bme280.get_humidity()
 	except:
-		value = None
-	Y_humidity['values']['Humidity'].append(value)
-	return update_graph(X, Y_humidity)
+		return None
 
 # Pressure
-@app.callback(Output('graph-pressure', 'figure'),
-			  [Input('graph-update', 'n_intervals')])
-def update_graph_temperature(input_data):
+def read_pressure():
 	try:
-		value = bme280.get_pressure()
+		return bme280.get_pressure()
 	except:
-		value = None
-	Y_pressure['values']['Pressure'].append(value)
-	return update_graph(X, Y_pressure)
+		return None
 
 # Light
-@app.callback(Output('graph-light', 'figure'),
-			  [Input('graph-update', 'n_intervals')])
-def update_graph_temperature(input_data):
+def read_light():
 	try:
-		value = ltr559.get_lux()
+		return ltr559.get_lux()
 	except:
-		value = None
-	Y_light['values']['Light'].append(value)
-	return update_graph(X, Y_light)
+		return None
 
 # Gases
-@app.callback([Output('graph-gases-red-nh3', 'figure'),
-	           Output('graph-gases-ox', 'figure')],
-			  [Input('graph-update', 'n_intervals')])
-def update_graph_gases(input_data):
+def read_gases():
 	try:
 		gases = gas.read_all()
-		value_red = gases.reducing / 1000
-		value_nh3 = gases.nh3 / 1000
-		value_oxi = gases.oxidising / 1000
+		return (gases.reducing / 1000,
+				gases.nh3 / 1000,
+				gases.oxidising / 1000)
 	except:
-		value_red = None
-		value_nh3 = None
-		value_oxi = None
-	Y_gas_red_nh3['values']['RED'].append(value_red)
-	Y_gas_red_nh3['values']['NH3'].append(value_nh3)
-	Y_gas_oxi['values']['OX'].append(value_oxi)
-	return (update_graph(X, Y_gas_red_nh3), update_graph(X, Y_gas_oxi))
+		return (None, None, None)
 
 # Particulate matter
-@app.callback([Output('graph-particulates-small', 'figure'),
-			   Output('graph-particulates-large', 'figure')],
-			  [Input('graph-update', 'n_intervals')])
-def update_graph_particulates(input_data):
+def read_particulates():
 	try:
 		particles = pms5003.read()
 		pm100 = particles.pm_per_1l_air(10.0)
@@ -321,23 +334,57 @@ def update_graph_particulates(input_data):
 		pm10  = particles.pm_per_1l_air(1.0) - pm100 - pm50 - pm25
 		pm5   = particles.pm_per_1l_air(0.5) - pm100 - pm50 - pm25 - pm10
 		pm3   = particles.pm_per_1l_air(0.3) - pm100 - pm50 - pm25 - pm10 - pm5
+		return (pm3, pm5, pm10, pm25, pm50, pm100)
 	except:
-		pm100 = None
-		pm50  = None
-		pm25  = None
-		pm10  = None
-		pm5   = None
-		pm3   = None
-	Y_pms_small['values']['0.3 - 0.5 um'].append(pm3)
-	Y_pms_small['values']['0.5 - 1.0 um'].append(pm5)
-	Y_pms_large['values']['1.0 - 2.5  um'].append(pm10)
-	Y_pms_large['values']['2.5 - 5.0  um'].append(pm25)
-	Y_pms_large['values']['5.0 - 10.0 um'].append(pm50)
-	Y_pms_large['values']['>10.0 um'].append(pm100)
-	return (update_graph(X, Y_pms_small), update_graph(X, Y_pms_large))
+		return (None, None, None, None, None, None)
+
+def collect():
+	# Read every sensor first so the lock is only held while appending
+	now                                = local_time()
+	temperature                        = read_temperature()
+	humidity                           = read_humidity()
+	pressure                           = read_pressure()
+	light                              = read_light()
+	red, nh3, oxi                      = read_gases()
+	pm3, pm5, pm10, pm25, pm50, pm100  = read_particulates()
+	with data_lock:
+		store.append(now, {'Temperature':   temperature,
+						   'Humidity':      humidity,
+						   'Pressure':      pressure,
+						   'Light':         light,
+						   'RED':           red,
+						   'NH3':           nh3,
+						   'OX':            oxi,
+						   '0.3 - 0.5 um':  pm3,
+						   '0.5 - 1.0 um':  pm5,
+						   '1.0 - 2.5  um': pm10,
+						   '2.5 - 5.0  um': pm25,
+						   '5.0 - 10.0 um': pm50,
+						   '>10.0 um':      pm100})
+
+def collector():
+	# Schedule from a fixed start so slow sensor reads don't make the interval drift
+	next_time = time.time()
+	while True:
+		collect()
+		next_time += frequency
+		delay = next_time - time.time()
+		if delay < 0:
+			# Fell behind, skip the missed points rather than reading in a burst
+			next_time -= (delay // frequency) * frequency
+			delay = next_time - time.time()
+		time.sleep(max(0, delay))
+
+def start_collector():
+	thread = threading.Thread(target=collector, name='collector')
+	thread.daemon = True
+	thread.start()
+	return thread
 
 # --------------------------------------------------------------------------------------------------
 # --------------------------------------------------------------------------------------- APP LAUNCH
 if __name__ == '__main__':
-	app.run_server(host='0.0.0.0', port=8080 ,debug=True)
-
+	# In debug mode the reloader runs this script twice, only collect in the process serving requests
+	if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+		start_collector()
+	app.run_server(host='0.0.0.0', port=8080 ,debug=debug)
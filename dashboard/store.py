@@ -0,0 +1,148 @@
+# --------------------------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------------------ IMPORTS
+import numpy
+
+# --------------------------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------------------- STORE
+class RingStore(object):
+	"""Fixed size, columnar history of timestamped sensor values.
+
+	Timestamps are float64 seconds since the epoch and each column is float32, with NaN
+	for missing values. Every row is written twice, at i and i + size, so the rows in
+	order are always one contiguous slice and times() and column() never copy. Memory
+	is allocated once, up front, and appending is O(1).
+
+	"""
+	def __init__(self, columns, size):
+		self.columns    = list(columns)
+		self.size       = size
+		self._index     = dict((name, i) for i, name in enumerate(self.columns))
+		self._times     = numpy.zeros(size * 2, dtype=numpy.float64)
+		self._values    = numpy.full((len(self.columns), size * 2), numpy.nan, dtype=numpy.float32)
+		self.count      = 0 # Total rows appended since the last clear()
+		self.generation = 0 # Number of calls to clear(), so readers can tell count restarted
+		self._downsampled = {}
+
+	def __len__(self):
+		return min(self.count, self.size)
+
+	def append(self, timestamp, values):
+		"""Append one row.
+
+		:param timestamp: Time, in seconds since the epoch
+		:param values: Dict of column name to value, missing columns and None are stored as NaN
+
+		"""
+		row = self.count % self.size
+		for i, name in enumerate(self.columns):
+			value = values.get(name)
+			value = numpy.nan if value is None else value
+			self._values[i, row] = value
+			self._values[i, row + self.size] = value
+		self._times[row] = timestamp
+		self._times[row + self.size] = timestamp
+		# Publish the row only once it has been written in full
+		self.count += 1
+
+	def _slice(self):
+		end = self.count % self.size + self.size
+		return slice(end - len(self), end)
+
+	def times(self):
+		"""Return the timestamps, oldest first, as a read-only view."""
+		view = self._times[self._slice()]
+		view.flags.writeable = False
+		return view
+
+	def column(self, name):
+		"""Return a column's values, oldest first, as a read-only view."""
+		view = self._values[self._index[name], self._slice()]
+		view.flags.writeable = False
+		return view
+
+	def clear(self):
+		"""Discard all rows."""
+		self.count = 0
+		self.generation += 1
+		self._values.fill(numpy.nan)
+
+	def downsample(self, name, points):
+		"""Return a column's timestamps and values reduced to at most points points.
+
+		See downsample(). Results are cached per column and number of points until the
+		next append() or clear(), so any number of viewers cost one reduction.
+
+		"""
+		key   = (name, points)
+		state = (self.generation, self.count)
+		if self._downsampled.get(key, (None,))[0] != state:
+			self._downsampled[key] = (state, downsample(self.times(), self.column(name), points))
+		return self._downsampled[key][1]
+
+# --------------------------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------------- DOWNSAMPLING
+def downsample(times, values, points):
+	"""Reduce a series to at most points points for drawing.
+
+	The series is split into points / 2 equal buckets and the minimum and maximum of each
+	bucket are kept, in time order. With a bucket per pixel the line drawn is the same as
+	for every point. A bucket with no values is kept as a single NaN, so gaps still show.
+
+	Series with no more than points values are returned unchanged.
+
+	"""
+	count = len(values)
+	if count <= points:
+		return times, values
+	width   = -(-count // max(1, points // 2))
+	buckets = -(-count // width)
+	padded  = numpy.full(buckets * width, numpy.nan, dtype=values.dtype)
+	padded[:count] = values
+	padded  = padded.reshape(buckets, width)
+	missing = numpy.isnan(padded)
+	# Missing values can never be the minimum or maximum, in an empty bucket both are its first value
+	low     = numpy.where(missing, numpy.inf, padded).argmin(axis=1)
+	high    = numpy.where(missing, -numpy.inf, padded).argmax(axis=1)
+	indices = numpy.sort(numpy.stack((low, high), axis=1), axis=1)
+	indices = (indices + numpy.arange(0, buckets * width, width)[:, None]).ravel()
+	# Drop the repeated index of buckets that are empty or hold a single value
+	keep    = numpy.ones(len(indices), dtype=bool)
+	keep[1::2] = indices[1::2] != indices[0::2]
+	indices = indices[keep]
+	return times[indices], values[indices]
+
+# --------------------------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------------ CHART UPDATES
+def chart_update(position, generation, count, size, points, refresh):
+	"""Decide how to bring a page's charts up to date with a store.
+
+	Full figures are sent when the page has none yet, after a clear(), when the page has
+	fallen more than size rows behind and, once charts are downsampled, after every
+	refresh rows so the downsampled history stays accurate. Otherwise the charts are
+	extended by the rows appended since the last update.
+
+	:param position: [generation, count, count at the last full figures] the page was last sent, or None
+	:param generation: The store's generation
+	:param count: The store's count
+	:param size: The store's size
+	:param points: Maximum number of points per series in a full figure
+	:param refresh: Number of rows a downsampled chart is extended by before it is sent in full
+
+	Returns the number of rows to extend the charts by, None for full figures or 0 if there
+	is nothing new, and the position to keep for the next update.
+
+	"""
+	if (position is None or position[0] != generation or count - position[1] > size or
+			(min(count, size) > points and count - position[2] >= refresh)):
+		return None, [generation, count, count]
+	return count - position[1], [generation, count, position[2]]
+
+def chart_max_points(size, points, refresh):
+	"""Return the number of points per series a browser should keep as charts are extended.
+
+	Trim the browser's copy as the store trims, or just above the size of a downsampled chart.
+
+	"""
+	if size <= points:
+		return size
+	return points + refresh
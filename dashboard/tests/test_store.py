@@ -0,0 +1,219 @@
+import os
+import sys
+import warnings
+from collections import deque
+
+import numpy
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from store import RingStore, chart_max_points, chart_update, downsample  # noqa: E402
+
+
+def _series(count, seed=0, missing=0.2):
+    random = numpy.random.RandomState(seed)
+    values = random.uniform(-100, 100, count)
+    values[random.uniform(size=count) < missing] = numpy.nan
+    return values
+
+
+def _reference_downsample(times, values, points):
+    # One bucket at a time: empty buckets keep their first row, others their minimum and maximum
+    width = -(-len(values) // (points // 2))
+    indices = []
+    for start in range(0, len(values), width):
+        bucket = values[start:start + width]
+        if numpy.isnan(bucket).all():
+            indices.append(start)
+            continue
+        low = start + int(numpy.nanargmin(bucket))
+        high = start + int(numpy.nanargmax(bucket))
+        indices.extend(sorted(set((low, high))))
+    return times[indices], values[indices]
+
+
+def test_ring_store_wraparound():
+    columns = ['a', 'b']
+    size = 7
+    store = RingStore(columns, size)
+    a = _series(3 * size + 4, seed=1)
+    b = _series(3 * size + 4, seed=2, missing=0.6)
+    times = deque(maxlen=size)
+    reference = dict((name, deque(maxlen=size)) for name in columns)
+
+    assert len(store) == 0
+    for i in range(len(a)):
+        row = {'a': None if numpy.isnan(a[i]) else a[i], 'b': b[i]}
+        if i % 5 == 0:
+            # Missing columns are stored as NaN too
+            del row['b']
+        store.append(1000.0 + i, row)
+        times.append(1000.0 + i)
+        reference['a'].append(a[i])
+        reference['b'].append(b[i] if i % 5 else numpy.nan)
+
+        assert len(store) == len(times)
+        numpy.testing.assert_array_equal(store.times(), list(times))
+        for name in columns:
+            numpy.testing.assert_array_equal(store.column(name), numpy.array(reference[name], dtype=numpy.float32))
+
+
+def test_ring_store_views():
+    store = RingStore(['a'], 5)
+    for i in range(8):
+        store.append(i, {'a': i})
+    times = store.times()
+    column = store.column('a')
+    assert numpy.shares_memory(times, store._times)
+    assert numpy.shares_memory(column, store._values)
+    with pytest.raises(ValueError):
+        column[0] = 0
+    with pytest.raises(ValueError):
+        times[0] = 0
+    # Writing the ring itself is unaffected
+    store.append(8, {'a': 8})
+    numpy.testing.assert_array_equal(store.column('a'), [4, 5, 6, 7, 8])
+
+
+def test_ring_store_clear():
+    store = RingStore(['a'], 4)
+    for i in range(6):
+        store.append(i, {'a': i})
+    before = store.downsample('a', 2)
+    store.clear()
+
+    assert len(store) == 0
+    assert store.count == 0
+    assert store.generation == 1
+    assert len(store.times()) == 0
+    assert len(store.column('a')) == 0
+
+    # Nothing of the old rows shows through
+    store.append(100, {'a': 50})
+    store.append(101, {'a': None})
+    numpy.testing.assert_array_equal(store.times(), [100, 101])
+    numpy.testing.assert_array_equal(store.column('a'), [50, numpy.nan])
+
+    # Refilling to the same count must not return a cached result from before clear()
+    for i in range(4):
+        store.append(102 + i, {'a': -i})
+    assert store.count == 6
+    after = store.downsample('a', 2)
+    numpy.testing.assert_array_equal(after[0], [102, 105])
+    assert not numpy.array_equal(before[1], after[1])
+
+
+def test_ring_store_downsample_cache():
+    store = RingStore(['a', 'b'], 100)
+    for i in range(100):
+        store.append(i, {'a': i, 'b': -i})
+    first = store.downsample('a', 10)
+    assert store.downsample('a', 10) is first
+    assert store.downsample('a', 20) is not first
+    numpy.testing.assert_array_equal(store.downsample('b', 10)[1], -first[1])
+    store.append(100, {'a': 100, 'b': -100})
+    assert store.downsample('a', 10) is not first
+    assert store.downsample('a', 10)[1][-1] == 100
+
+
+def test_downsample_unchanged():
+    times = numpy.arange(10, dtype=numpy.float64)
+    values = _series(10).astype(numpy.float32)
+    result = downsample(times, values, 10)
+    assert result[0] is times and result[1] is values
+
+
+@pytest.mark.parametrize('count,points', [(1000, 100), (1001, 100), (997, 64), (300, 10), (60, 6)])
+def test_downsample_buckets(count, points):
+    times = numpy.arange(count, dtype=numpy.float64) * 20.0
+    values = _series(count, seed=count).astype(numpy.float32)
+    width = -(-count // (points // 2))
+    # An empty bucket, and a bucket holding a single value
+    values[width:2 * width] = numpy.nan
+    values[2 * width:3 * width] = numpy.nan
+    values[2 * width + 1] = 42.0
+
+    result = downsample(times, values, points)
+    expected = _reference_downsample(times, values, points)
+    numpy.testing.assert_array_equal(result[0], expected[0])
+    numpy.testing.assert_array_equal(result[1], expected[1])
+
+    assert len(result[0]) <= points
+    assert (numpy.diff(result[0]) > 0).all()
+    # The empty bucket shows as a single gap, the single value appears once
+    assert list(result[0]).count(times[width]) == 1
+    assert numpy.isnan(result[1][list(result[0]).index(times[width])])
+    assert list(result[1]).count(42.0) == 1
+    # Every bucket's extent survives
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        assert numpy.nanmin(result[1]) == numpy.nanmin(values)
+        assert numpy.nanmax(result[1]) == numpy.nanmax(values)
+
+
+def test_downsample_all_missing():
+    times = numpy.arange(100, dtype=numpy.float64)
+    values = numpy.full(100, numpy.nan, dtype=numpy.float32)
+    result = downsample(times, values, 10)
+    numpy.testing.assert_array_equal(result[0], numpy.arange(0, 100, 20))
+    assert numpy.isnan(result[1]).all()
+
+
+def test_chart_update_first():
+    # A page with no charts yet gets full figures, even of an empty store
+    assert chart_update(None, 0, 0, 100, 10, 5) == (None, [0, 0, 0])
+    assert chart_update(None, 2, 40, 100, 10, 5) == (None, [2, 40, 40])
+
+
+def test_chart_update_extend():
+    position = [0, 3, 3]
+    assert chart_update(position, 0, 3, 100, 10, 5) == (0, [0, 3, 3])
+    assert chart_update(position, 0, 4, 100, 10, 5) == (1, [0, 4, 3])
+    # Not downsampled yet, so no refresh however many rows are added
+    assert chart_update([0, 4, 3], 0, 10, 100, 10, 5) == (6, [0, 10, 3])
+
+
+def test_chart_update_reset():
+    # After clear() the generation changes, even if count has caught up again
+    assert chart_update([0, 5, 5], 1, 5, 100, 10, 5) == (None, [1, 5, 5])
+    assert chart_update([0, 5, 5], 1, 0, 100, 10, 5) == (None, [1, 0, 0])
+
+
+def test_chart_update_behind():
+    # The rows the page is missing have already left the store
+    assert chart_update([0, 10, 10], 0, 110, 100, 200, 5) == (100, [0, 110, 10])
+    assert chart_update([0, 10, 10], 0, 111, 100, 200, 5) == (None, [0, 111, 111])
+
+
+def test_chart_update_refresh():
+    # Once downsampled, full figures every refresh rows
+    assert chart_update([0, 20, 20], 0, 24, 100, 10, 5) == (4, [0, 24, 20])
+    assert chart_update([0, 24, 20], 0, 25, 100, 10, 5) == (None, [0, 25, 25])
+    # Downsampling depends on the rows stored, not on the rows appended
+    assert chart_update([0, 200, 150], 0, 201, 100, 100, 5) == (1, [0, 201, 150])
+    assert chart_update([0, 200, 150], 0, 201, 100, 99, 5) == (None, [0, 201, 201])
+    # Just at the point count, nothing is downsampled yet
+    assert chart_update([0, 5, 5], 0, 10, 100, 10, 5) == (5, [0, 10, 5])
+    assert chart_update([0, 10, 5], 0, 11, 100, 10, 5) == (None, [0, 11, 11])
+
+
+def test_chart_update_store():
+    store = RingStore(['a'], 8)
+    position = None
+    sent = []
+    for i in range(30):
+        store.append(i, {'a': i})
+        rows, position = chart_update(position, store.generation, store.count, store.size, 4, 3)
+        sent.append(rows)
+        if i == 19:
+            store.clear()
+    # Full at first, then every 3 rows once more than 4 are stored, then again after clear()
+    assert sent[:12] == [None, 1, 1, 1, None, 1, 1, None, 1, 1, None, 1]
+    assert sent[20] is None
+
+
+def test_chart_max_points():
+    # Keep as many as the store holds, or a downsampled chart and the rows it is extended by
+    assert chart_max_points(100, 1000, 90) == 100
+    assert chart_max_points(1000, 1000, 90) == 1000
+    assert chart_max_points(4320, 1000, 90) == 1090
@@ -1,6 +1,6 @@
 import ST7735
 from PIL import Image, ImageDraw
-from enviroplus.noise import Noise
+from enviroplus.noise import Noise, NoiseMonitor
 
 print("""noise-amps-at-freqs.py - Measure amplitude from specific frequency bins
 
@@ -13,6 +13,8 @@ Press Ctrl+C to exit!
 """)
 
 noise = Noise()
+monitor = NoiseMonitor(noise)
+monitor.start()
 
 disp = ST7735.ST7735(
         port=0,
@@ -28,7 +30,7 @@ draw = ImageDraw.Draw(img)
 
 
 while True:
-    amps = noise.get_amplitudes_at_frequency_ranges([
+    amps = monitor.wait().get_amplitudes_at_frequency_ranges([
         (100, 200),
         (500, 600),
         (1000, 1200)
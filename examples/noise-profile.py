@@ -1,16 +1,20 @@
 import ST7735
 from PIL import Image, ImageDraw
-from enviroplus.noise import Noise
+from enviroplus.noise import Noise, NoiseMonitor
 
 print("""noise-profile.py - Get a simple noise profile.
 
 This example grabs a basic 3-bin noise profile of low, medium and high frequency noise, plotting the noise characteristics as coloured bars.
 
+Noise is analysed continuously in the background, the display is updated with each new profile.
+
 Press Ctrl+C to exit!
 
 """)
 
 noise = Noise()
+monitor = NoiseMonitor(noise)
+monitor.start()
 
 disp = ST7735.ST7735(
         port=0,
@@ -26,7 +30,7 @@ draw = ImageDraw.Draw(img)
 
 
 while True:
-    low, mid, high, amp = noise.get_noise_profile()
+    low, mid, high, amp = monitor.wait().get_noise_profile()
     low *= 128
     mid *= 128
     high *= 128
@@ -0,0 +1,35 @@
+import ST7735
+import numpy
+from PIL import Image
+from enviroplus.noise import Noise, NoiseMonitor, NoiseSpectrogram
+
+print("""noise-spectrogram.py - Display a scrolling spectrogram
+
+This example shows the last few seconds of sound on the Enviro+ display, time runs left to right and frequency, up to about 5kHz, bottom to top.
+
+Press Ctrl+C to exit!
+
+""")
+
+disp = ST7735.ST7735(
+    port=0,
+    cs=ST7735.BG_SPI_CS_FRONT,
+    dc=9,
+    backlight=12,
+    rotation=90)
+
+disp.begin()
+
+# One frame per column and one 62.5Hz bin per row, levels from -90dB to -10dB
+spectrogram = NoiseSpectrogram(frames=disp.width, frame_size=256, floor=-90.0, ceiling=-10.0)
+monitor = NoiseMonitor(Noise(duration=0.1), spectrogram=spectrogram)
+monitor.start()
+
+image = numpy.zeros((disp.height, disp.width), dtype=numpy.uint8)
+
+while True:
+    monitor.wait()
+    # view() doesn't copy, flip the lowest bins so low frequencies are at the bottom
+    frames = spectrogram.view()[:, :disp.height]
+    image[:, disp.width - len(frames):] = frames.T[::-1]
+    disp.display(Image.fromarray(image, 'L').convert('RGB'))
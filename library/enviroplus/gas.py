@@ -1,17 +1,62 @@
 """Read the MICS6814 via an ads1015 ADC"""
 
 import time
+import math
 import atexit
+import threading
+import collections
 import ads1015
+import numpy
 import RPi.GPIO as GPIO
 
+try:
+    from time import monotonic as _monotonic
+except ImportError:
+    from time import time as _monotonic
+
 MICS6814_HEATER_PIN = 24
 MICS6814_GAIN = 6.144
+MICS6814_SAMPLE_RATE = 1600
+MICS6814_LOAD_RESISTANCE = 56000
+MICS6814_SUPPLY_VOLTAGE = 3.3
 
 ads1015.I2C_ADDRESS_DEFAULT = ads1015.I2C_ADDRESS_ALTERNATE
 _is_setup = False
 _adc_enabled = False
 _adc_gain = 6.148
+_scan_mode = False
+_scan_timing = None
+_background = None
+_heater_on_time = None
+# The clock may be stepped by NTP soon after boot, just as the heater is switched
+# on, so warm-up is timed on the monotonic clock
+_heater_on_monotonic = None
+
+# Serialises multi-transaction sequences (multiplexer, gain, conversion)
+# between foreground reads and the background sampler
+_lock = threading.RLock()
+
+# In continuous mode the conversion in flight when the multiplexer is changed
+# still completes on the old channel, so the first result on the new channel
+# can take up to two conversion periods, plus a margin for the +-10% tolerance
+# of the ADS1015's internal oscillator.
+_scan_settle_time = 2.2 / MICS6814_SAMPLE_RATE
+_conversion_timeout = 0.1
+
+MICS6814_CHANNELS = {
+    'oxidising': 'in0/gnd',
+    'reducing': 'in1/gnd',
+    'nh3': 'in2/gnd',
+    'adc': 'ref/gnd'
+}
+MICS6814_SAMPLE_DTYPE = numpy.dtype([
+    ('timestamp', numpy.float64),
+    ('oxidising', numpy.float64),
+    ('reducing', numpy.float64),
+    ('nh3', numpy.float64),
+    ('adc', numpy.float64)
+])
+_gas_channels = [MICS6814_CHANNELS[name] for name in ('oxidising', 'reducing', 'nh3')]
 
 
 class Mics6814Reading(object):
@@ -24,22 +69,122 @@ class Mics6814Reading(object):
         self.adc = adc
 
     def __repr__(self):
-        fmt = """Oxidising: {ox:05.02f} Ohms
-Reducing: {red:05.02f} Ohms
-NH3: {nh3:05.02f} Ohms"""
-        if self.adc is not None:
-            fmt += """
-ADC: {adc:05.02f} Volts
-"""
-        return fmt.format(
-            ox=self.oxidising,
-            red=self.reducing,
-            nh3=self.nh3,
-            adc=self.adc)
+        lines = []
+        for label, value, units in (
+                ('Oxidising', self.oxidising, 'Ohms'),
+                ('Reducing', self.reducing, 'Ohms'),
+                ('NH3', self.nh3, 'Ohms'),
+                ('ADC', self.adc, 'Volts')):
+            if value is not None:
+                lines.append('{}: {:05.02f} {}'.format(label, value, units))
+        return '\n'.join(lines)
+
+    __str__ = __repr__
+
+
+class Mics6814ScanTiming(object):
+    __slots__ = 'channels', 'total'
+
+    def __init__(self, channels, total):
+        self.channels = channels
+        self.total = total
+
+    def __repr__(self):
+        return '\n'.join(['{}: {:.06f}s'.format(channel, duration) for channel, duration in self.channels] + [
+            'Total: {:.06f}s'.format(self.total)])
+
+    __str__ = __repr__
+
+
+class Mics6814BackgroundStatus(object):
+    __slots__ = 'running', 'readings', 'errors', 'last_error', 'last_reading_time'
+
+    def __init__(self, running, readings, errors, last_error, last_reading_time):
+        self.running = running
+        self.readings = readings
+        self.errors = errors
+        self.last_error = last_error
+        self.last_reading_time = last_reading_time
+
+    def __repr__(self):
+        return "Running: {} Readings: {} Errors: {} Last error: {!r}".format(
+            self.running, self.readings, self.errors, self.last_error)
 
     __str__ = __repr__
 
 
+class Mics6814Samples(object):
+    __slots__ = 'data', 'sample_rate'
+
+    def __init__(self, data, sample_rate):
+        self.data = data
+        self.sample_rate = sample_rate
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return "{} samples at {:.01f} samples/sec".format(len(self.data), self.sample_rate)
+
+    __str__ = __repr__
+
+
+class _StabilityTracker(object):
+    """Rolling mean and variance of the gas channels over a recent period of time.
+
+    Uses Welford's algorithm, with the inverse update to drop readings once
+    they are older than the window, so each update is O(1) and numerically
+    stable. The window is in seconds, so a burst of readings can't fill it.
+
+    """
+    def __init__(self, window, threshold, warmup):
+        self.window = window
+        self.threshold = threshold
+        self.warmup = warmup
+        self.reset()
+
+    def reset(self):
+        self._values = collections.deque()
+        self._mean = [0.0, 0.0, 0.0]
+        self._m2 = [0.0, 0.0, 0.0]
+
+    def update(self, values, now):
+        self._values.append((now, values))
+        n = len(self._values)
+        for i, x in enumerate(values):
+            delta = x - self._mean[i]
+            self._mean[i] += delta / n
+            self._m2[i] += delta * (x - self._mean[i])
+        self._expire(now)
+
+    def _expire(self, now):
+        while self._values and self._values[0][0] < now - self.window:
+            y = self._values.popleft()[1]
+            n = len(self._values)
+            if n == 0:
+                self.reset()
+                return
+            for i, x in enumerate(y):
+                mean = self._mean[i]
+                self._mean[i] -= (x - mean) / n
+                self._m2[i] -= (x - mean) * (x - self._mean[i])
+
+    def is_stable(self, now):
+        self._expire(now)
+        n = len(self._values)
+        # Readings must cover at least half the window, not just a single burst
+        if n < 2 or self._values[-1][0] - self._values[0][0] < self.window / 2.0:
+            return False
+        for mean, m2 in zip(self._mean, self._m2):
+            deviation = math.sqrt(max(m2, 0.0) / (n - 1))
+            if mean <= 0 or deviation > self.threshold * mean:
+                return False
+        return True
+
+
+_stability = _StabilityTracker(30.0, 0.01, 60.0)
+
+
 def setup():
     global adc, _is_setup
     if _is_setup:
@@ -47,17 +192,26 @@ def setup():
     _is_setup = True
 
     adc = ads1015.ADS1015(i2c_addr=0x49)
-    adc.set_mode('single')
+    adc.set_mode('continuous' if _scan_mode else 'single')
     adc.set_programmable_gain(MICS6814_GAIN)
-    adc.set_sample_rate(1600)
+    adc.set_sample_rate(MICS6814_SAMPLE_RATE)
 
     GPIO.setwarnings(False)
     GPIO.setmode(GPIO.BCM)
     GPIO.setup(MICS6814_HEATER_PIN, GPIO.OUT)
-    GPIO.output(MICS6814_HEATER_PIN, 1)
+    _set_heater(True)
     atexit.register(cleanup)
 
 
+def _set_heater(value):
+    global _heater_on_time, _heater_on_monotonic
+    GPIO.output(MICS6814_HEATER_PIN, 1 if value else 0)
+    with _lock:
+        _heater_on_time = time.time() if value else None
+        _heater_on_monotonic = _monotonic() if value else None
+        _stability.reset()
+
+
 def enable_adc(value=True):
     """Enable reading from the additional ADC pin."""
     global _adc_enabled
@@ -70,44 +224,606 @@ def set_adc_gain(value):
     _adc_gain = value
 
 
+def enable_scan_mode(value=True):
+    """Enable continuous, round-robin scanning of the gas channels.
+
+    The ADC is left free-running and each channel costs one multiplexer
+    write, then polls the conversion register until the second new result,
+    which is the first converted on that channel. That is up to two
+    conversion periods, 1.375ms with margin, where single-shot mode waits
+    one, but with fewer i2c register writes.
+
+    Which mode is faster depends on the i2c bus speed, so compare the
+    get_scan_timing() of each on your hardware before enabling this.
+
+    """
+    global _scan_mode
+    _scan_mode = value
+    if _is_setup:
+        with _lock:
+            adc.set_mode('continuous' if value else 'single')
+
+
+def get_scan_timing():
+    """Return the per-channel timing breakdown of the last read."""
+    return _scan_timing
+
+
+def enable_heater(value=True):
+    """Switch the MICS6814 heater on or off.
+
+    Readings are not meaningful until the heater has warmed up, see is_stable().
+
+    """
+    setup()
+    _set_heater(value)
+
+
+def get_heater_on_time():
+    """Return the time the heater was switched on, or None if it is off."""
+    return _heater_on_time
+
+
+def set_stability(window=30.0, threshold=0.01, warmup=60.0):
+    """Set the criteria for considering the gas readings stable.
+
+    Readings are stable once the heater has been on for at least warmup
+    seconds and the standard deviation of each gas channel, over readings
+    from the last window seconds, is within threshold of its mean. The
+    readings must span at least half the window.
+
+    :param window: Period, in seconds, of readings to consider
+    :param threshold: Maximum standard deviation as a fraction of the mean (0.01 = 1%)
+    :param warmup: Minimum time, in seconds, since the heater was switched on
+
+    """
+    with _lock:
+        _stability.window = window
+        _stability.threshold = threshold
+        _stability.warmup = warmup
+        _stability.reset()
+
+
+def is_stable():
+    """Return True if the heater has warmed up and readings have settled."""
+    with _lock:
+        now = _monotonic()
+        if _heater_on_monotonic is None or now - _heater_on_monotonic < _stability.warmup:
+            return False
+        return _stability.is_stable(now)
+
+
+def wait_until_stable(timeout=None, interval=1.0):
+    """Take readings until they have settled.
+
+    Returns True once stable, or False if timeout expires first.
+
+    :param timeout: Maximum time, in seconds, to wait
+    :param interval: Time, in seconds, between readings
+
+    """
+    setup()
+    t_start = _monotonic()
+    for _ in readings(interval):
+        if is_stable():
+            return True
+        if timeout is not None and _monotonic() - t_start >= timeout:
+            return False
+
+
 def cleanup():
-    GPIO.output(MICS6814_HEATER_PIN, 0)
+    stop_background()
+    _set_heater(False)
+
+
+def voltage_to_resistance(voltage, load_resistance=MICS6814_LOAD_RESISTANCE, supply_voltage=MICS6814_SUPPLY_VOLTAGE):
+    """Convert MICS6814 channel voltage to sensor resistance.
+
+    Accepts a scalar or a NumPy array. Voltages equal to the supply voltage,
+    where the divider equation is undefined, are returned as 0.
+
+    :param voltage: Voltage, or array of voltages, measured across the load resistor
+    :param load_resistance: Load resistor value in Ohms
+    :param supply_voltage: Voltage across the sensor and load resistor
+
+    """
+    voltage = numpy.asarray(voltage, dtype=numpy.float64)
+    singular = voltage == supply_voltage
+    difference = numpy.where(singular, 1.0, supply_voltage - voltage)
+    resistance = numpy.where(singular, 0.0, (voltage * load_resistance) / difference)
+    if resistance.ndim == 0:
+        return float(resistance)
+    return resistance
+
+
+def _to_voltage(value, gain):
+    return value / 2048.0 * gain
+
+
+def _scan_voltage(channel, gain):
+    adc.set_multiplexer(channel)
+    # The conversion in flight when the multiplexer changes still completes on
+    # the old channel, so the second new result is the first on this channel.
+    # Results are spotted by polling for a change of value. One that repeats
+    # the previous value is missed, so never wait longer than the worst case.
+    t_start = time.time()
+    value = adc.get_conversion_value()
+    changes = 0
+    while changes < 2:
+        if time.time() - t_start >= _scan_settle_time:
+            return _to_voltage(adc.get_conversion_value(), gain)
+        latest = adc.get_conversion_value()
+        if latest != value:
+            changes += 1
+            value = latest
+    return _to_voltage(value, gain)
+
+
+def _wait_for_conversion():
+    # Poll the OS bit back-to-back, a single conversion at 1600sps is
+    # shorter than the 1ms sleep in ADS1015.wait_for_conversion.
+    t_start = time.time()
+    while not adc.conversion_ready():
+        if (time.time() - t_start) > _conversion_timeout:
+            raise ads1015.ADS1015TimeoutError("Timed out waiting for conversion.")
+
+
+def _single_voltage(channel, gain):
+    adc.set_multiplexer(channel)
+    adc.start_conversion()
+    _wait_for_conversion()
+    return _to_voltage(adc.get_conversion_value(), gain)
+
+
+def _read_voltage(channel, gain):
+    with _lock:
+        if _scan_mode:
+            return _scan_voltage(channel, gain)
+        return _single_voltage(channel, gain)
+
+
+def _read_adc_voltage():
+    if _adc_gain == MICS6814_GAIN:
+        return _read_voltage(MICS6814_CHANNELS['adc'], MICS6814_GAIN)
+
+    # A single-shot conversion started after the gain change
+    # always uses the new gain, so there's no need to settle
+    with _lock:
+        adc.set_programmable_gain(_adc_gain)
+        try:
+            return _read_voltage(MICS6814_CHANNELS['adc'], _adc_gain)
+        finally:
+            adc.set_programmable_gain(MICS6814_GAIN)
+
+
+def read(channels=None):
+    """Return a reading containing only the requested channels.
+
+    Channels that are not requested are left as None.
+
+    :param channels: Any of 'oxidising', 'reducing', 'nh3' and 'adc', defaults to all gas channels plus 'adc' if enabled
+
+    """
+    global _scan_timing
+    setup()
+
+    if channels is None:
+        channels = ['oxidising', 'reducing', 'nh3']
+        if _adc_enabled:
+            channels.append('adc')
+
+    for name in channels:
+        if name not in MICS6814_CHANNELS:
+            raise ValueError("Invalid channel {}, must be one of {}".format(name, ', '.join(sorted(MICS6814_CHANNELS))))
+
+    values = {}
+    timing = []
+    t_start = t_last = time.time()
+
+    for name in ('oxidising', 'reducing', 'nh3', 'adc'):
+        if name not in channels:
+            continue
+        if name == 'adc':
+            values[name] = _read_adc_voltage()
+        else:
+            values[name] = voltage_to_resistance(_read_voltage(MICS6814_CHANNELS[name], MICS6814_GAIN))
+        t_now = time.time()
+        timing.append((name, t_now - t_last))
+        t_last = t_now
+
+    _scan_timing = Mics6814ScanTiming(timing, t_last - t_start)
+
+    if all(name in values for name in ('oxidising', 'reducing', 'nh3')):
+        with _lock:
+            _stability.update((values['oxidising'], values['reducing'], values['nh3']), _monotonic())
+
+    return Mics6814Reading(
+        values.get('oxidising'),
+        values.get('reducing'),
+        values.get('nh3'),
+        values.get('adc'))
 
 
 def read_all():
     """Return gas resistence for oxidising, reducing and NH3"""
-    setup()
-    ox = adc.get_voltage('in0/gnd')
-    red = adc.get_voltage('in1/gnd')
-    nh3 = adc.get_voltage('in2/gnd')
+    return read()
 
-    try:
-        ox = (ox * 56000) / (3.3 - ox)
-    except ZeroDivisionError:
-        ox = 0
 
-    try:
-        red = (red * 56000) / (3.3 - red)
-    except ZeroDivisionError:
-        red = 0
+def read_batch(samples=10):
+    """Return a list of readings, grouping conversions by gain.
 
-    try:
-        nh3 = (nh3 * 56000) / (3.3 - nh3)
-    except ZeroDivisionError:
-        nh3 = 0
+    All MICS6814 channels are converted first at the sensor gain, then the
+    spare ADC channel (if enabled) is converted for every sample at its own
+    gain, so the gain is switched at most twice per batch.
 
-    analog = None
+    :param samples: Number of readings to take
+
+    """
+    setup()
+
+    voltages = []
+    for _ in range(samples):
+        voltages.append([_read_voltage(channel, MICS6814_GAIN) for channel in _gas_channels])
+
+    analog = [None] * samples
 
     if _adc_enabled:
-        if _adc_gain == MICS6814_GAIN:
-            analog = adc.get_voltage('ref/gnd')
-        else:
-            adc.set_programmable_gain(_adc_gain)
-            time.sleep(0.05)
-            analog = adc.get_voltage('ref/gnd')
-            adc.set_programmable_gain(MICS6814_GAIN)
+        with _lock:
+            if _adc_gain != MICS6814_GAIN:
+                adc.set_programmable_gain(_adc_gain)
+            try:
+                analog = [_read_voltage(MICS6814_CHANNELS['adc'], _adc_gain) for _ in range(samples)]
+            finally:
+                if _adc_gain != MICS6814_GAIN:
+                    adc.set_programmable_gain(MICS6814_GAIN)
+
+    readings = []
+    for (ox, red, nh3), value in zip(voltage_to_resistance(voltages).tolist(), analog):
+        readings.append(Mics6814Reading(ox, red, nh3, value))
+
+    if readings:
+        # A burst is one point in time, so it counts once towards stability
+        with _lock:
+            mean = numpy.mean([(reading.oxidising, reading.reducing, reading.nh3) for reading in readings], axis=0)
+            _stability.update(tuple(mean.tolist()), _monotonic())
+
+    return readings
+
+
+def sample(samples=None, duration=None):
+    """Sample all channels as fast as the ADC allows into a NumPy array.
+
+    Raw voltages are stored into a preallocated structured array of
+    MICS6814_SAMPLE_DTYPE and converted to resistance in one step once
+    sampling has finished. The spare ADC channel is NaN unless enabled.
+
+    Returns a Mics6814Samples with the array and the achieved sample rate.
+
+    :param samples: Number of samples to take
+    :param duration: Alternatively, time in seconds to sample for
+
+    """
+    if (samples is None) == (duration is None):
+        raise ValueError("Specify one of samples or duration")
+
+    setup()
+
+    if samples is None:
+        # Each sample needs at least one conversion, so this is an upper bound
+        samples = int(duration * MICS6814_SAMPLE_RATE) + 1
+
+    data = numpy.empty(samples, dtype=MICS6814_SAMPLE_DTYPE)
+    nan = float('nan')
+    count = 0
+
+    t_start = time.time()
+    t_end = None if duration is None else t_start + duration
+
+    while count < samples:
+        t_now = time.time()
+        if t_end is not None and t_now >= t_end:
+            break
+        ox, red, nh3 = [_read_voltage(channel, MICS6814_GAIN) for channel in _gas_channels]
+        analog = _read_adc_voltage() if _adc_enabled else nan
+        data[count] = (t_now, ox, red, nh3, analog)
+        count += 1
+
+    elapsed = time.time() - t_start
+    data = data[:count]
+
+    for name in ('oxidising', 'reducing', 'nh3'):
+        data[name] = voltage_to_resistance(data[name])
+
+    return Mics6814Samples(data, count / elapsed if elapsed > 0 else 0.0)
+
+
+class _Schedule(object):
+    """Deadlines at a fixed interval on the monotonic clock.
+
+    Deadlines are absolute, so time spent reading the sensor is absorbed
+    rather than added to the interval. Deadlines that have passed entirely
+    are skipped and counted as missed.
+
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self.missed = 0
+        self._deadline = None
+
+    def delay(self):
+        now = _monotonic()
+        if self._deadline is None:
+            self._deadline = now
+        late = now - self._deadline
+        if late >= self.interval:
+            skipped = int(late // self.interval)
+            self.missed += skipped
+            self._deadline += skipped * self.interval
+        return max(0.0, self._deadline - now)
+
+    def advance(self):
+        self._deadline += self.interval
+
+
+class Mics6814Readings(object):
+    """Iterator of readings taken at a fixed cadence.
+
+    The number of deadlines skipped because a reading, or the code
+    consuming the readings, overran is available as missed.
+
+    """
+    def __init__(self, interval, channels=None):
+        self._schedule = _Schedule(interval)
+        self._channels = channels
+
+    @property
+    def missed(self):
+        return self._schedule.missed
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        time.sleep(self._schedule.delay())
+        self._schedule.advance()
+        return read(self._channels)
+
+    next = __next__
+
+
+def readings(interval=1.0, channels=None):
+    """Return an iterator of readings evenly spaced in time.
 
-    return Mics6814Reading(ox, red, nh3, analog)
+    Usage::
+
+        for reading in gas.readings(1.0):
+            print(reading)
+
+    :param interval: Time, in seconds, between readings
+    :param channels: Any of 'oxidising', 'reducing', 'nh3' and 'adc'
+
+    """
+    return Mics6814Readings(interval, channels)
+
+
+class Mics6814DutyCycleStats(object):
+    __slots__ = 'cycles', 'unstable', 'heater_on', 'elapsed'
+
+    def __init__(self):
+        self.cycles = 0
+        self.unstable = 0
+        self.heater_on = 0.0
+        self.elapsed = 0.0
+
+    @property
+    def heater_on_fraction(self):
+        if self.elapsed <= 0:
+            return 0.0
+        return self.heater_on / self.elapsed
+
+    def __repr__(self):
+        return """Cycles: {cycles} ({unstable} unstable)
+Heater on: {heater_on:.01f}s of {elapsed:.01f}s ({fraction:.01%})""".format(
+            cycles=self.cycles,
+            unstable=self.unstable,
+            heater_on=self.heater_on,
+            elapsed=self.elapsed,
+            fraction=self.heater_on_fraction)
+
+    __str__ = __repr__
+
+
+class Mics6814DutyCycle(object):
+    """Iterator of bursts of readings with the heater duty-cycled.
+
+    Each burst switches the heater on, waits for readings to settle, takes
+    the readings and switches the heater off again. The heater then stays
+    off for off_time seconds before the next burst.
+
+    Running totals, including the fraction of time the heater was on, are
+    available as stats. Each cycle counts its on time and the off time that
+    follows it, so the fraction is on / (on + off_time) from the first burst.
+
+    """
+    def __init__(self, burst, off_time, warmup_timeout, interval):
+        self._burst = burst
+        self._off_time = off_time
+        self._warmup_timeout = warmup_timeout
+        self._interval = interval
+        self._t_off = None
+        self.stats = Mics6814DutyCycleStats()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        setup()
+        if self._t_off is not None:
+            time.sleep(max(0.0, self._t_off + self._off_time - _monotonic()))
+            # The off time was counted when the last burst ended, add any overrun
+            self.stats.elapsed += max(0.0, _monotonic() - self._t_off - self._off_time)
+
+        t_on = _monotonic()
+        _set_heater(True)
+        try:
+            if not wait_until_stable(self._warmup_timeout, self._interval):
+                self.stats.unstable += 1
+            result = [read_all() for _ in range(self._burst)]
+        finally:
+            _set_heater(False)
+            self._t_off = _monotonic()
+            self.stats.cycles += 1
+            self.stats.heater_on += self._t_off - t_on
+            self.stats.elapsed += self._t_off - t_on + self._off_time
+
+        return result
+
+    next = __next__
+
+
+def duty_cycle(burst=10, off_time=300.0, warmup_timeout=300.0, interval=1.0):
+    """Return an iterator of bursts of readings with the heater duty-cycled.
+
+    Usage::
+
+        cycle = gas.duty_cycle(burst=5, off_time=600)
+        for readings in cycle:
+            print(readings[-1])
+            print(cycle.stats)
+
+    :param burst: Number of readings to take once stable
+    :param off_time: Time, in seconds, to leave the heater off between bursts
+    :param warmup_timeout: Maximum time, in seconds, to wait for readings to settle
+    :param interval: Time, in seconds, between readings while warming up
+
+    """
+    return Mics6814DutyCycle(burst, off_time, warmup_timeout, interval)
+
+
+class _BackgroundSampler(object):
+    def __init__(self, rate, history):
+        self._schedule = _Schedule(1.0 / rate)
+        # At least two rows, so the newest complete row is never the one being written
+        self._data = numpy.zeros(max(2, int(rate * history)), dtype=MICS6814_SAMPLE_DTYPE)
+        self._count = 0
+        self._errors = 0
+        self._last_error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        nan = float('nan')
+        while not self._stop.wait(self._schedule.delay()):
+            self._schedule.advance()
+            try:
+                reading = read()
+            except Exception as e:
+                # Keep sampling through transient i2c errors, status() reports them
+                self._errors += 1
+                self._last_error = e
+                continue
+            self._data[self._count % len(self._data)] = (
+                time.time(),
+                reading.oxidising,
+                reading.reducing,
+                reading.nh3,
+                nan if reading.adc is None else reading.adc)
+            # Publish the row only once it has been written in full
+            self._count += 1
+
+    def latest(self):
+        count = self._count
+        if count == 0:
+            return None
+        row = self._data[(count - 1) % len(self._data)]
+        analog = float(row['adc'])
+        return Mics6814Reading(
+            float(row['oxidising']),
+            float(row['reducing']),
+            float(row['nh3']),
+            None if numpy.isnan(analog) else analog)
+
+    def status(self):
+        count = self._count
+        last = None
+        if count > 0:
+            last = float(self._data[(count - 1) % len(self._data)]['timestamp'])
+        return Mics6814BackgroundStatus(self._thread.is_alive(), count, self._errors, self._last_error, last)
+
+    def window(self, seconds):
+        count = self._count
+        size = len(self._data)
+        # Once the ring is full, slot count % size is the next one written, skip it
+        indices = numpy.arange(max(0, count - size + 1), count) % size
+        data = self._data.take(indices)
+        return data[data['timestamp'] >= time.time() - seconds]
+
+
+def start_background(rate=10.0, history=600.0):
+    """Start sampling all channels in a background thread.
+
+    Readings are stored in a ring buffer and can be retrieved at any time with
+    latest() and window() without waiting on the i2c bus.
+
+    :param rate: Readings per second
+    :param history: Number of seconds of readings to keep
+
+    """
+    global _background
+    setup()
+    stop_background()
+    _background = _BackgroundSampler(rate, history)
+    _background.start()
+
+
+def stop_background():
+    """Stop the background sampler, if running."""
+    global _background
+    if _background is not None:
+        _background.stop()
+        _background = None
+
+
+def latest():
+    """Return the most recent background reading, or None if there isn't one yet."""
+    if _background is None:
+        raise RuntimeError("Background sampling is not running, call start_background() first")
+    return _background.latest()
+
+
+def window(seconds):
+    """Return background readings from the last given number of seconds.
+
+    Returns a copy of the readings, oldest first, as an array of MICS6814_SAMPLE_DTYPE.
+
+    :param seconds: Age, in seconds, of the oldest reading to return
+
+    """
+    if _background is None:
+        raise RuntimeError("Background sampling is not running, call start_background() first")
+    return _background.window(seconds)
+
+
+def background_status():
+    """Return the state of the background sampler.
+
+    Failed readings are skipped and counted rather than stopping the sampler.
+    Use the error count, last error and time of the last reading to tell if
+    the data from latest() and window() is stale.
+
+    """
+    if _background is None:
+        raise RuntimeError("Background sampling is not running, call start_background() first")
+    return _background.status()
 
 
 def read_oxidising():
@@ -115,8 +831,7 @@ def read_oxidising():
 
     Eg chlorine, nitrous oxide
     """
-    setup()
-    return read_all().oxidising
+    return read(['oxidising']).oxidising
 
 
 def read_reducing():
@@ -124,17 +839,16 @@ def read_reducing():
 
     Eg hydrogen, carbon monoxide
     """
-    setup()
-    return read_all().reducing
+    return read(['reducing']).reducing
 
 
 def read_nh3():
     """Return gas resistance for nh3/ammonia"""
-    setup()
-    return read_all().nh3
+    return read(['nh3']).nh3
 
 
 def read_adc():
     """Return spare ADC channel value"""
-    setup()
-    return read_all().adc
+    if not _adc_enabled:
+        return None
+    return read(['adc']).adc
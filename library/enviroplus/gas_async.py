@@ -0,0 +1,91 @@
+"""asyncio interface to the MICS6814 gas sensor.
+
+Bus I/O runs on a dedicated single-worker executor so a gas read,
+including any wait for ADC conversions, never blocks the event loop.
+
+Requires Python 3.5 or later.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+
+from . import gas
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # A single worker keeps bus transactions strictly ordered
+        _executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    return _executor
+
+
+def _run(func, *args):
+    loop = asyncio.get_event_loop()
+    return loop.run_in_executor(_get_executor(), functools.partial(func, *args))
+
+
+async def async_read(channels=None):
+    """Return a reading containing only the requested channels.
+
+    See gas.read() for details.
+
+    :param channels: Any of 'oxidising', 'reducing', 'nh3' and 'adc'
+
+    """
+    return await _run(gas.read, channels)
+
+
+async def async_read_all():
+    """Return gas resistence for oxidising, reducing and NH3"""
+    return await _run(gas.read_all)
+
+
+class AsyncReadings(object):
+    """Asynchronous iterator of gas readings taken at a fixed cadence.
+
+    The number of deadlines skipped because a reading, or the code
+    consuming the readings, overran is available as missed.
+
+    Usage::
+
+        async for reading in async_readings(1.0):
+            print(reading)
+
+    """
+    def __init__(self, interval, channels=None):
+        self._schedule = gas._Schedule(interval)
+        self._channels = channels
+
+    @property
+    def missed(self):
+        return self._schedule.missed
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(self._schedule.delay())
+        self._schedule.advance()
+        return await async_read(self._channels)
+
+
+def async_readings(interval=1.0, channels=None):
+    """Return an asynchronous iterator of gas readings evenly spaced in time.
+
+    :param interval: Time, in seconds, between readings
+    :param channels: Any of 'oxidising', 'reducing', 'nh3' and 'adc'
+
+    """
+    return AsyncReadings(interval, channels)
+
+
+def shutdown():
+    """Stop the bus worker, waiting for any pending reads to finish."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
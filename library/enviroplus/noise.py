@@ -1,34 +1,239 @@
+import math
+import threading
 import sounddevice
 import numpy
 
 
-class Noise():
-    def __init__(self,
-                 sample_rate=16000,
-                 duration=0.5):
-        """Noise measurement.
+try:
+    numpy.fft.rfft(numpy.zeros(2, dtype=numpy.float32), out=numpy.zeros(2, dtype=numpy.complex64))
+    _rfft_out = True
+except TypeError:
+    _rfft_out = False
 
-        :param sample_rate: Sample rate in Hz
-        :param duraton: Duration, in seconds, of noise sample capture
+
+def _rfft(samples, n=None, axis=-1, out=None):
+    """Single precision, in-place rfft where NumPy supports it (NumPy 2.0 and later)."""
+    if _rfft_out and out is not None:
+        return numpy.fft.rfft(samples, n=n, axis=axis, out=out)
+    return numpy.fft.rfft(samples, n=n, axis=axis)
+
+
+def _frames(samples, size, step):
+    """Return a read-only view of overlapping frames without copying."""
+    count = 1 + (len(samples) - size) // step
+    stride = samples.strides[0]
+    return numpy.lib.stride_tricks.as_strided(
+        samples,
+        shape=(count, size),
+        strides=(step * stride, stride),
+        writeable=False)
+
+
+_weightings = {}
+
+
+def _weighting(weighting, sample_rate, fft_size, bins):
+    """Return the power gain of a frequency weighting at each FFT bin.
+
+    Curves follow IEC 61672-1 and are cached per sample rate and FFT size.
+
+    """
+    key = weighting, sample_rate, fft_size, bins
+    if key not in _weightings:
+        f2 = (numpy.arange(bins) * (float(sample_rate) / fft_size)) ** 2
+        if weighting == 'A':
+            gain = (12194.0 ** 2 * f2 ** 2) / (
+                (f2 + 20.6 ** 2) * numpy.sqrt((f2 + 107.7 ** 2) * (f2 + 737.9 ** 2)) * (f2 + 12194.0 ** 2))
+            gain = gain ** 2 * 10 ** (2.0 / 10)
+        elif weighting == 'C':
+            gain = (12194.0 ** 2 * f2) / ((f2 + 20.6 ** 2) * (f2 + 12194.0 ** 2))
+            gain = gain ** 2 * 10 ** (0.062 / 10)
+        elif weighting == 'Z':
+            gain = numpy.ones(bins)
+        else:
+            raise ValueError("weighting must be one of 'A', 'C' or 'Z'")
+        _weightings[key] = gain
+    return _weightings[key]
+
+
+_filter_banks = {}
+
+
+def _filter_bank(fraction, minimum, sample_rate, fft_size, bins):
+    """Return centre frequencies and first/last+1 bin of each fractional octave band.
+
+    Bands use the IEC 61260 base-10 ratio and are cached per sample rate and FFT size.
+
+    """
+    key = fraction, minimum, sample_rate, fft_size, bins
+    if key not in _filter_banks:
+        ratio = 10 ** (3.0 / 10)
+        nyquist = sample_rate / 2.0
+        # Odd fractions have a band centred on 1kHz, even fractions straddle it
+        offset = 0.0 if fraction % 2 else 0.5
+        lowest = int(math.floor(fraction * math.log(minimum / 1000.0, ratio) - offset))
+        highest = int(math.ceil(fraction * math.log(nyquist / 1000.0, ratio) - offset))
+        index = numpy.arange(lowest, highest + 1) + offset
+        centres = 1000.0 * ratio ** (index / fraction)
+        lower = centres * ratio ** (-0.5 / fraction)
+        upper = centres * ratio ** (0.5 / fraction)
+        # Allow for minimum being given as a rounded nominal frequency, eg 20Hz for 19.95Hz
+        keep = (centres >= minimum * 0.98) & (upper <= nyquist)
+        centres, lower, upper = centres[keep], lower[keep], upper[keep]
+        scale = fft_size / float(sample_rate)
+        start = numpy.clip(numpy.ceil(lower * scale), 0, bins).astype(numpy.intp)
+        end = numpy.clip(numpy.ceil(upper * scale), 0, bins).astype(numpy.intp)
+        _filter_banks[key] = centres, start, end
+    return _filter_banks[key]
+
+
+class NoiseLevelStats(object):
+    def __init__(self, resolution=0.1, minimum=-100.0, maximum=150.0):
+        """Running Leq, Lmax, L10 and L90 of a series of sound levels.
+
+        Percentiles come from a fixed histogram of time spent at each level,
+        so memory use doesn't grow however long the statistics run.
+
+        :param resolution: Histogram resolution in dB
+        :param minimum: Lowest level, in dB, levels below, including -inf for silence, are counted here and add nothing to Leq
+        :param maximum: Highest level, in dB, levels above are counted here
 
         """
+        self.resolution = resolution
+        self.minimum = minimum
+        self._histogram = numpy.zeros(int(math.ceil((maximum - minimum) / resolution)) + 1)
+        self.reset()
 
-        self.duration = duration
+    def reset(self):
+        """Clear all statistics."""
+        self._histogram[:] = 0
+        self._energy = 0.0
+        self.duration = 0.0
+        self.lmax = float('-inf')
+
+    def update(self, level, duration):
+        """Add a level measured over the given duration.
+
+        :param level: Sound level in dB
+        :param duration: Time, in seconds, the level was measured over
+
+        """
+        if not level >= self.minimum:
+            # Also catches -inf, as for digital silence, and NaN
+            self._histogram[0] += duration
+        else:
+            position = min((level - self.minimum) / self.resolution + 1e-6, len(self._histogram) - 1)
+            self._histogram[int(math.floor(position))] += duration
+            self._energy += 10 ** (level / 10.0) * duration
+            self.lmax = max(self.lmax, level)
+        self.duration += duration
+
+    @property
+    def leq(self):
+        """Equivalent continuous level in dB."""
+        if self._energy <= 0:
+            return float('-inf')
+        return 10 * math.log10(self._energy / self.duration)
+
+    def get_percentile_level(self, percent):
+        """Return the level, in dB, exceeded for the given percentage of the time.
+
+        :param percent: Percentage of time, eg 10 for L10
+
+        """
+        if self.duration <= 0:
+            return float('-inf')
+        cumulative = numpy.cumsum(self._histogram) / self.duration
+        index = int(numpy.searchsorted(cumulative, 1.0 - percent / 100.0 - 1e-9))
+        return self.minimum + min(index, len(self._histogram) - 1) * self.resolution
+
+    @property
+    def l10(self):
+        """Level exceeded 10% of the time, in dB."""
+        return self.get_percentile_level(10)
+
+    @property
+    def l90(self):
+        """Level exceeded 90% of the time, in dB."""
+        return self.get_percentile_level(90)
+
+    def __repr__(self):
+        return "Leq: {:.01f}dB Lmax: {:.01f}dB L10: {:.01f}dB L90: {:.01f}dB".format(
+            self.leq, self.lmax, self.l10, self.l90)
+
+    __str__ = __repr__
+
+
+class NoiseSpectrum(object):
+    def __init__(self, magnitude, sample_rate, fft_size=None, window_power=None, calibration=0.0, cumulative_buffer=None):
+        """Magnitude spectrum of a single noise capture.
+
+        :param magnitude: Magnitude of each FFT bin
+        :param sample_rate: Sample rate, in Hz, of the capture
+        :param fft_size: Length of the transform, defaults to sample_rate (1Hz per bin)
+        :param window_power: Sum of the squared window applied before the transform, defaults to fft_size (no window)
+        :param calibration: Offset, in dB, added to sound levels
+        :param cumulative_buffer: Optional array of len(magnitude) + 1 float64 to reuse for band lookups
+
+        """
+        self.magnitude = magnitude
         self.sample_rate = sample_rate
+        self.fft_size = sample_rate if fft_size is None else fft_size
+        self.hz_per_bin = float(sample_rate) / self.fft_size
+        self.window_power = self.fft_size if window_power is None else window_power
+        self.calibration = calibration
+        self._cumulative = None
+        self._cumulative_buffer = cumulative_buffer
+        self._power = None
+
+    @property
+    def frequencies(self):
+        """Centre frequency, in Hz, of each FFT bin."""
+        return numpy.arange(len(self.magnitude)) * self.hz_per_bin
+
+    def _bin(self, frequency):
+        # First bin whose centre frequency is at or above the given frequency
+        return int(math.ceil(frequency * self.fft_size / float(self.sample_rate)))
+
+    def _bins(self, frequencies):
+        bins = numpy.ceil(numpy.asarray(frequencies, dtype=numpy.float64) * self.fft_size / float(self.sample_rate))
+        return numpy.clip(bins, 0, len(self.magnitude)).astype(numpy.intp)
+
+    def _band_means(self, start, end):
+        """Return the mean magnitude between each start and end frequency.
+
+        Uses a prefix sum of the magnitudes, built on first use, so each band
+        costs two lookups regardless of its width. Empty bands are NaN.
+
+        """
+        if self._cumulative is None:
+            cumulative = self._cumulative_buffer
+            if cumulative is None:
+                cumulative = numpy.empty(len(self.magnitude) + 1)
+            # Copy then sum in place, avoiding the temporary of a casting cumsum
+            cumulative[0] = 0.0
+            numpy.copyto(cumulative[1:], self.magnitude)
+            numpy.cumsum(cumulative[1:], out=cumulative[1:])
+            self._cumulative = cumulative
+        start = self._bins(start)
+        end = self._bins(end)
+        count = end - start
+        total = self._cumulative[end] - self._cumulative[start]
+        return numpy.where(count > 0, total / numpy.maximum(count, 1), numpy.nan)
 
     def get_amplitudes_at_frequency_ranges(self, ranges):
         """Return the mean amplitude of frequencies in the given ranges.
 
-        :param ranges: List of ranges including a start and end range
+        A NumPy array of ranges is answered with a NumPy array in one vectorized step.
+
+        :param ranges: List, or N x 2 array, of ranges including a start and end range
 
         """
-        recording = self._record()
-        magnitude = numpy.abs(numpy.fft.rfft(recording[:, 0], n=self.sample_rate))
-        result = []
-        for r in ranges:
-            start, end = r
-            result.append(numpy.mean(magnitude[start:end]))
-        return result
+        result = numpy.asarray(ranges, dtype=numpy.float64).reshape(-1, 2)
+        result = self._band_means(result[:, 0], result[:, 1])
+        if isinstance(ranges, numpy.ndarray):
+            return result
+        return result.tolist()
 
     def get_amplitude_at_frequency_range(self, start, end):
         """Return the mean amplitude of frequencies in the specified range.
@@ -41,9 +246,7 @@ class Noise():
         if start > n or end > n:
             raise ValueError("Maxmimum frequency is {}".format(n))
 
-        recording = self._record()
-        magnitude = numpy.abs(numpy.fft.rfft(recording[:, 0], n=self.sample_rate))
-        return numpy.mean(magnitude[start:end])
+        return self._band_means(start, end)[()]
 
     def get_noise_profile(self,
                           noise_floor=100,
@@ -64,23 +267,572 @@ class Noise():
         if high is None:
             high = 1.0 - low - mid
 
-        recording = self._record()
-        magnitude = numpy.abs(numpy.fft.rfft(recording[:, 0], n=self.sample_rate))
-
         sample_count = (self.sample_rate // 2) - noise_floor
 
         mid_start = noise_floor + int(sample_count * low)
         high_start = mid_start + int(sample_count * mid)
         noise_ceiling = high_start + int(sample_count * high)
 
-        amp_low = numpy.mean(magnitude[noise_floor:mid_start])
-        amp_mid = numpy.mean(magnitude[mid_start:high_start])
-        amp_high = numpy.mean(magnitude[high_start:noise_ceiling])
+        amp_low, amp_mid, amp_high = self._band_means(
+            (noise_floor, mid_start, high_start),
+            (mid_start, high_start, noise_ceiling))
         amp_total = (low + mid + high) / 3.0
 
         return amp_low, amp_mid, amp_high, amp_total
 
+    def get_power(self):
+        """Return each bin's contribution to the mean square of the capture.
+
+        By Parseval's theorem these sum to the mean square of the (windowed)
+        signal, with the negative frequencies folded into the positive bins.
+
+        """
+        if self._power is None:
+            power = self.magnitude ** 2 * (2.0 / (self.fft_size * self.window_power))
+            power[0] /= 2
+            if self.fft_size % 2 == 0:
+                power[-1] /= 2
+            self._power = power
+        return self._power
+
+    def get_level(self, weighting='A'):
+        """Return the sound level in dB.
+
+        :param weighting: Frequency weighting, one of 'A', 'C' or 'Z' (none)
+
+        """
+        power = numpy.dot(self.get_power(), _weighting(weighting, self.sample_rate, self.fft_size, len(self.magnitude)))
+        if power <= 0:
+            return float('-inf')
+        return 10 * math.log10(power) + self.calibration
+
+    def get_band_level(self, start=0, end=None, weighting='Z'):
+        """Return the sound level, in dB, of a frequency range.
+
+        :param start: Start frequency (in Hz)
+        :param end: Optional end frequency (in Hz), defaults to the maximum frequency
+        :param weighting: Frequency weighting, one of 'A', 'C' or 'Z' (none)
+
+        """
+        start = self._bin(start)
+        end = len(self.magnitude) if end is None else min(self._bin(end), len(self.magnitude))
+        gain = _weighting(weighting, self.sample_rate, self.fft_size, len(self.magnitude))
+        power = numpy.dot(self.get_power()[start:end], gain[start:end])
+        if power <= 0:
+            return float('-inf')
+        return 10 * math.log10(power) + self.calibration
+
+    def get_octave_bands(self, fraction=1, weighting='Z', minimum=20.0):
+        """Return the centre frequencies and levels, in dB, of fractional octave bands.
+
+        Band edges are mapped to bins once per sample rate and FFT size, so each
+        call is a single cumulative sum and two lookups. Bands too narrow to
+        contain an FFT bin are -inf.
+
+        :param fraction: Bands per octave, eg 1 for octave or 3 for 1/3-octave bands
+        :param weighting: Frequency weighting, one of 'A', 'C' or 'Z' (none)
+        :param minimum: Lowest band centre frequency, in Hz
+
+        """
+        centres, start, end = _filter_bank(fraction, minimum, self.sample_rate, self.fft_size, len(self.magnitude))
+        power = self.get_power() * _weighting(weighting, self.sample_rate, self.fft_size, len(self.magnitude))
+        cumulative = numpy.concatenate(([0.0], numpy.cumsum(power)))
+        power = cumulative[end] - cumulative[start]
+        with numpy.errstate(divide='ignore'):
+            levels = 10 * numpy.log10(numpy.where(end > start, power, 0.0)) + self.calibration
+        return centres, levels
+
+    def get_peak_frequency(self, start=0, end=None):
+        """Return the frequency and amplitude of the loudest bin in a range.
+
+        :param start: Start frequency (in Hz)
+        :param end: Optional end frequency (in Hz), defaults to the maximum frequency
+
+        """
+        start = self._bin(start)
+        end = None if end is None else self._bin(end)
+        magnitude = self.magnitude[start:end]
+        peak = int(numpy.argmax(magnitude))
+        return (start + peak) * self.hz_per_bin, magnitude[peak]
+
+
+class NoiseSpectrogram(object):
+    def __init__(self,
+                 frames=160,
+                 frame_size=256,
+                 sample_rate=16000,
+                 hop=None,
+                 dtype='uint8',
+                 floor=-100.0,
+                 ceiling=0.0):
+        """Fixed size history of short-time spectra.
+
+        Each frame is the Hann-windowed power spectrum of frame_size samples,
+        in dB relative to a full scale RMS of 1.0. With a dtype of 'uint8'
+        levels from floor to ceiling are scaled to 0-255, with 'float16'
+        levels are stored in dB, clipped at floor.
+
+        Frames are kept in a preallocated ring buffer which is written twice
+        over, so the frames in order are always a contiguous slice of it and
+        view() never copies. Memory use is 2 x frames x bins values, however
+        long the spectrogram is fed.
+
+        :param frames: Number of frames to keep
+        :param frame_size: Samples per frame, there are frame_size // 2 + 1 frequency bins
+        :param sample_rate: Sample rate in Hz
+        :param hop: Samples between the start of each frame, defaults to frame_size (no overlap)
+        :param dtype: Storage format, either 'uint8' or 'float16'
+        :param floor: Level, in dB, stored as 0 in 'uint8' format and the minimum in 'float16'
+        :param ceiling: Level, in dB, stored as 255 in 'uint8' format
+
+        """
+        if dtype not in ('uint8', 'float16'):
+            raise ValueError("dtype must be 'uint8' or 'float16'")
+        if ceiling <= floor:
+            raise ValueError("ceiling must be above floor")
+
+        self.frames = frames
+        self.frame_size = frame_size
+        self.sample_rate = sample_rate
+        self.hop = frame_size if hop is None else hop
+        self.dtype = dtype
+        self.floor = floor
+        self.ceiling = ceiling
+        self.bins = frame_size // 2 + 1
+        # Stream position, in samples, of the next frame, see Noise.update_spectrogram
+        self.position = 0
+
+        self._window = numpy.hanning(frame_size).astype(numpy.float32)
+        # Scale the squared magnitude to each bin's contribution to the mean square
+        self._scale = 2.0 / (frame_size * numpy.sum(self._window.astype(numpy.float64) ** 2))
+        self._data = numpy.zeros((frames * 2, self.bins), dtype=dtype)
+        self._count = 0
+
+    def __len__(self):
+        return min(self._count, self.frames)
+
+    @property
+    def frequencies(self):
+        """Centre frequency, in Hz, of each bin."""
+        return numpy.arange(self.bins) * (float(self.sample_rate) / self.frame_size)
+
+    def append(self, samples):
+        """Add frames for a block of samples.
+
+        Samples after the last whole frame are discarded, to feed a
+        spectrogram from a stream without gaps use Noise.update_spectrogram.
+
+        :param samples: Mono samples, either float or int16
+
+        """
+        samples = numpy.asarray(samples)
+        if len(samples) < self.frame_size:
+            return
+        frames = _frames(samples, self.frame_size, self.hop)[-self.frames:]
+        spectra = _rfft(frames.astype(numpy.float32) * self._window, axis=1)
+        power = spectra.real ** 2 + spectra.imag ** 2
+        if samples.dtype == numpy.int16:
+            power /= 32768.0 ** 2
+        power *= self._scale
+        with numpy.errstate(divide='ignore'):
+            levels = 10 * numpy.log10(power)
+        numpy.maximum(levels, self.floor, out=levels)
+        if self.dtype == 'uint8':
+            levels -= self.floor
+            levels *= 255.0 / (self.ceiling - self.floor)
+            numpy.minimum(levels, 255.0, out=levels)
+            numpy.rint(levels, out=levels)
+
+        rows = (self._count + numpy.arange(len(levels))) % self.frames
+        self._data[rows] = levels
+        self._data[rows + self.frames] = levels
+        # Publish the frames only once they have been written in full
+        self._count += len(levels)
+
+    def view(self):
+        """Return the frames, oldest first, as a read-only frames x bins view.
+
+        The view shares memory with the ring buffer. Take a copy, or use
+        export(), to keep frames beyond the next update.
+
+        """
+        count = self._count
+        end = count % self.frames + self.frames
+        view = self._data[end - min(count, self.frames):end]
+        view.flags.writeable = False
+        return view
+
+    def export(self, decibels=False):
+        """Return a copy of the frames, oldest first.
+
+        :param decibels: Convert the frames to float32 levels in dB, rather than the storage format
+
+        """
+        frames = self.view()
+        if not decibels:
+            return frames.copy()
+        levels = frames.astype(numpy.float32)
+        if self.dtype == 'uint8':
+            levels *= (self.ceiling - self.floor) / 255.0
+            levels += self.floor
+        return levels
+
+    def reset(self):
+        """Discard all frames."""
+        self._count = 0
+        self.position = 0
+
+    def __repr__(self):
+        return "NoiseSpectrogram(frames={}/{}, bins={}, dtype={!r})".format(
+            len(self), self.frames, self.bins, self.dtype)
+
+    __str__ = __repr__
+
+
+class Noise():
+    def __init__(self,
+                 sample_rate=16000,
+                 duration=0.5,
+                 fft_size=None,
+                 estimator='fft',
+                 segment_size=1024,
+                 overlap=0.5,
+                 calibration=0.0,
+                 dtype='float64'):
+        """Noise measurement.
+
+        By default each capture is zero-padded to a one second transform, giving
+        1Hz per bin. A shorter transform is much cheaper and frequency ranges are
+        mapped onto bins according to their real frequency, though amplitudes
+        are not directly comparable between FFT sizes.
+
+        The 'welch' estimator instead splits the capture into overlapping,
+        Hann-windowed segments and averages their power, trading frequency
+        resolution for band levels that are much more stable between calls.
+
+        Sound levels are reported in dB relative to a full scale RMS of 1.0,
+        plus the calibration offset. Set calibration to the dB SPL that reads
+        as 0dBFS on your microphone for levels in dB SPL.
+
+        A dtype of 'float32' or 'int16' selects a low-footprint mode. Audio is
+        captured into a reusable buffer of that type and analysed in single
+        precision into preallocated arrays, so measurements don't allocate
+        capture or spectrum sized arrays. A NoiseSpectrum then shares these
+        arrays and is only valid until the next measurement.
+
+        :param sample_rate: Sample rate in Hz
+        :param duraton: Duration, in seconds, of noise sample capture
+        :param fft_size: FFT length, one of None (sample_rate), 'native' (capture length), 'pow2' (next power of two above the capture length) or a number of points
+        :param estimator: Either 'fft' for a single transform of the whole capture, or 'welch'
+        :param segment_size: Welch segment length in samples, this is also the FFT length
+        :param overlap: Welch segment overlap (as a float, 0.5 = 50%)
+        :param calibration: Offset, in dB, added to all sound levels
+        :param dtype: Capture sample format, one of 'float64', 'float32' or 'int16'
+
+        """
+
+        self.duration = duration
+        self.sample_rate = sample_rate
+        self.calibration = calibration
+
+        samples = int(duration * sample_rate)
+        if fft_size is None:
+            fft_size = sample_rate
+        elif fft_size == 'native':
+            fft_size = samples
+        elif fft_size == 'pow2':
+            fft_size = 1 << (samples - 1).bit_length()
+        self.fft_size = int(fft_size)
+
+        if estimator not in ('fft', 'welch'):
+            raise ValueError("estimator must be 'fft' or 'welch'")
+        self.estimator = estimator
+
+        if estimator == 'welch':
+            if segment_size > samples:
+                raise ValueError("segment_size must not exceed the {} sample capture".format(samples))
+            if not 0 <= overlap < 1:
+                raise ValueError("overlap must be at least 0 and less than 1")
+            self.fft_size = segment_size
+            self._window = numpy.hanning(segment_size)
+            self._window_power = numpy.sum(self._window ** 2)
+            self._step = max(1, int(segment_size * (1.0 - overlap)))
+
+        if dtype not in ('float64', 'float32', 'int16'):
+            raise ValueError("dtype must be one of 'float64', 'float32' or 'int16'")
+        self.dtype = dtype
+        self._capture = None
+        if dtype != 'float64':
+            self._allocate(samples)
+
+        self._stream = None
+        self._buffer = None
+        self._written = 0
+        self._consumed = 0
+        self._filled = threading.Event()
+
+    def _allocate(self, samples):
+        bins = self.fft_size // 2 + 1
+        self._capture = numpy.zeros((samples, 1), dtype=self.dtype)
+        self._work = numpy.zeros(samples, dtype=numpy.float32)
+        self._magnitude = numpy.zeros(bins, dtype=numpy.float32)
+        self._cumulative = numpy.zeros(bins + 1, dtype=numpy.float64)
+        if self.estimator == 'welch':
+            count = 1 + (samples - self.fft_size) // self._step
+            self._window = self._window.astype(numpy.float32)
+            self._windowed = numpy.zeros((count, self.fft_size), dtype=numpy.float32)
+            self._spectra = numpy.zeros((count, bins), dtype=numpy.complex64)
+            self._segment_power = numpy.zeros((count, bins), dtype=numpy.float32)
+        else:
+            self._spectra = numpy.zeros(bins, dtype=numpy.complex64)
+
+    def __enter__(self):
+        self.start_stream()
+        return self
+
+    def __exit__(self, exception_type, exception_value, exception_traceback):
+        self.stop_stream()
+
+    def start_stream(self, buffer_duration=None):
+        """Start capturing continuously into a ring buffer.
+
+        While streaming, each measurement analyses the most recent duration
+        seconds of audio immediately instead of recording a fresh sample.
+
+        :param buffer_duration: Length, in seconds, of the ring buffer, defaults to twice the capture duration
+
+        """
+        if self._stream is not None:
+            return
+
+        if buffer_duration is None:
+            buffer_duration = self.duration * 2
+        buffer_duration = max(buffer_duration, self.duration)
+
+        self._buffer = numpy.zeros(int(buffer_duration * self.sample_rate), dtype=self.dtype)
+        self._written = 0
+        self._consumed = 0
+        self._filled.clear()
+
+        self._stream = sounddevice.InputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype=self.dtype,
+            callback=self._stream_callback
+        )
+        self._stream.start()
+
+    def stop_stream(self):
+        """Stop continuous capture."""
+        if self._stream is None:
+            return
+        self._stream.stop()
+        self._stream.close()
+        self._stream = None
+
+    def _stream_callback(self, indata, frames, time_info, status):
+        size = len(self._buffer)
+        data = indata[-size:, 0]
+        start = (self._written + frames - len(data)) % size
+        end = start + len(data)
+        if end <= size:
+            self._buffer[start:end] = data
+        else:
+            split = size - start
+            self._buffer[start:] = data[:split]
+            self._buffer[:end - size] = data[split:]
+        # Publish the samples only once they have been written in full
+        self._written += frames
+        if self._written >= int(self.duration * self.sample_rate):
+            self._filled.set()
+
+    def analyse(self):
+        """Record once and return the spectrum of the recording.
+
+        The returned NoiseSpectrum can answer any number of band, profile
+        and peak queries without recording or transforming again.
+
+        """
+        return self._spectrum(self._record()[:, 0])
+
+    def _spectrum(self, samples):
+        if self._capture is not None:
+            return self._spectrum_single(samples)
+        if self.estimator == 'welch':
+            magnitude = self._welch(samples)
+            window_power = self._window_power
+        else:
+            magnitude = numpy.abs(numpy.fft.rfft(samples, n=self.fft_size))
+            window_power = min(len(samples), self.fft_size)
+        return NoiseSpectrum(magnitude, self.sample_rate, self.fft_size, window_power, self.calibration)
+
+    def _welch(self, samples):
+        frames = _frames(samples, self.fft_size, self._step)
+        spectra = numpy.fft.rfft(frames * self._window, axis=1)
+        power = spectra.real ** 2 + spectra.imag ** 2
+        # RMS average of the segment magnitudes
+        return numpy.sqrt(power.mean(axis=0))
+
+    def _spectrum_single(self, samples):
+        # Convert in place, a mixed type multiply allocates casting buffers
+        numpy.copyto(self._work, samples)
+        if self.dtype == 'int16':
+            numpy.multiply(self._work, numpy.float32(1.0 / 32768), out=self._work)
+
+        if self.estimator == 'welch':
+            frames = _frames(self._work, self.fft_size, self._step)
+            numpy.multiply(frames, self._window, out=self._windowed)
+            spectra = _rfft(self._windowed, axis=1, out=self._spectra)
+            numpy.abs(spectra, out=self._segment_power)
+            numpy.square(self._segment_power, out=self._segment_power)
+            numpy.mean(self._segment_power, axis=0, out=self._magnitude)
+            numpy.sqrt(self._magnitude, out=self._magnitude)
+            window_power = self._window_power
+        else:
+            spectra = _rfft(self._work, n=self.fft_size, out=self._spectra)
+            numpy.abs(spectra, out=self._magnitude)
+            window_power = min(len(samples), self.fft_size)
+
+        return NoiseSpectrum(self._magnitude, self.sample_rate, self.fft_size, window_power, self.calibration,
+                             self._cumulative)
+
+    def get_level(self, weighting='A'):
+        """Return the sound level, in dB, of a capture.
+
+        :param weighting: Frequency weighting, one of 'A', 'C' or 'Z' (none)
+
+        """
+        return self.analyse().get_level(weighting)
+
+    def get_octave_bands(self, fraction=1, weighting='Z', minimum=20.0):
+        """Return the centre frequencies and levels, in dB, of fractional octave bands.
+
+        See NoiseSpectrum.get_octave_bands for details.
+
+        """
+        return self.analyse().get_octave_bands(fraction, weighting, minimum)
+
+    def update_level_stats(self, stats, weighting='A'):
+        """Add the level of newly captured audio to running level statistics.
+
+        When streaming, all audio captured since the last update is analysed
+        in consecutive, non-overlapping blocks of duration seconds. Any
+        remainder is kept for the next update. Audio that is about to be
+        overwritten in the ring buffer, when updates fall behind, is skipped.
+        Otherwise a single new capture is made.
+
+        :param stats: NoiseLevelStats to update
+        :param weighting: Frequency weighting, one of 'A', 'C' or 'Z' (none)
+
+        """
+        if self._stream is None:
+            stats.update(self.get_level(weighting), self.duration)
+            return
+
+        count = int(self.duration * self.sample_rate)
+        written = self._written
+        self._consumed = max(self._consumed, self._oldest(written))
+        while written - self._consumed >= count:
+            samples = self._copy_ring(self._consumed, count)[:, 0]
+            stats.update(self._spectrum(samples).get_level(weighting), self.duration)
+            self._consumed += count
+
+    def update_spectrogram(self, spectrogram):
+        """Add frames for newly captured audio to a spectrogram.
+
+        When streaming, all audio captured since the last update is added,
+        with frames continuing across updates. Any remainder is kept for the
+        next update. Otherwise a single new capture is made.
+
+        :param spectrogram: NoiseSpectrogram to update
+
+        """
+        if spectrogram.sample_rate != self.sample_rate:
+            raise ValueError("spectrogram sample_rate must be {}".format(self.sample_rate))
+
+        if self._stream is None:
+            spectrogram.append(self._record()[:, 0])
+            return
+
+        written = self._written
+        if spectrogram.position > written:
+            # The stream has been restarted
+            spectrogram.position = 0
+        position = max(spectrogram.position, self._oldest(written))
+        if written - position < spectrogram.frame_size:
+            return
+        count = (written - position - spectrogram.frame_size) // spectrogram.hop + 1
+        span = (count - 1) * spectrogram.hop + spectrogram.frame_size
+        samples = self._copy_ring(position, span, numpy.empty((span, 1), dtype=self._buffer.dtype))
+        spectrogram.append(samples[:, 0])
+        spectrogram.position = position + count * spectrogram.hop
+
+    def latest_spectrum(self, since=None, copy=False):
+        """Return the stream position and the spectrum of the newest capture.
+
+        Unlike analyse() this never waits. The spectrum is None until a full
+        capture has been streamed, or if no audio has arrived since the given
+        position.
+
+        :param since: Stream position returned by a previous call
+        :param copy: Return a spectrum that doesn't share the low-footprint buffers
+
+        """
+        if self._stream is None:
+            raise RuntimeError("Not streaming, call start_stream() first")
+        count = int(self.duration * self.sample_rate)
+        written = self._written
+        if written < count or written == since:
+            return written, None
+        spectrum = self._spectrum(self._copy_ring(written - count, count)[:, 0])
+        if copy and self._capture is not None:
+            # Low-footprint spectra share buffers that the next analysis overwrites
+            spectrum = NoiseSpectrum(spectrum.magnitude.copy(), spectrum.sample_rate, spectrum.fft_size,
+                                     spectrum.window_power, spectrum.calibration)
+        return written, spectrum
+
+    def get_amplitudes_at_frequency_ranges(self, ranges):
+        """Return the mean amplitude of frequencies in the given ranges.
+
+        :param ranges: List of ranges including a start and end range
+
+        """
+        return self.analyse().get_amplitudes_at_frequency_ranges(ranges)
+
+    def get_amplitude_at_frequency_range(self, start, end):
+        """Return the mean amplitude of frequencies in the specified range.
+
+        :param start: Start frequency (in Hz)
+        :param end: End frequency (in Hz)
+
+        """
+        n = self.sample_rate // 2
+        if start > n or end > n:
+            raise ValueError("Maxmimum frequency is {}".format(n))
+
+        return self.analyse().get_amplitude_at_frequency_range(start, end)
+
+    def get_noise_profile(self,
+                          noise_floor=100,
+                          low=0.12,
+                          mid=0.36,
+                          high=None):
+        """Returns a noise charateristic profile.
+
+        See NoiseSpectrum.get_noise_profile for details.
+
+        """
+        return self.analyse().get_noise_profile(noise_floor, low, mid, high)
+
     def _record(self):
+        if self._stream is not None:
+            return self._latest()
+        if self._capture is not None:
+            return sounddevice.rec(
+                out=self._capture,
+                samplerate=self.sample_rate,
+                blocking=True
+            )
         return sounddevice.rec(
             int(self.duration * self.sample_rate),
             samplerate=self.sample_rate,
@@ -88,3 +840,245 @@ class Noise():
             channels=1,
             dtype='float64'
         )
+
+    def _latest(self):
+        count = int(self.duration * self.sample_rate)
+        timeout = self.duration * 10
+        if not self._filled.wait(timeout):
+            raise RuntimeError("Timed out waiting {:.01f}s for audio".format(timeout))
+        return self._copy_ring(self._written - count, count)
+
+    def _oldest(self, written):
+        # Oldest stream position safe to copy from. Audio before it has been, or is
+        # about to be, overwritten, so leave a capture's worth of margin ahead of the
+        # slot the callback writes next
+        return written - len(self._buffer) + int(self.duration * self.sample_rate)
+
+    def _copy_ring(self, position, count, out=None):
+        # Copy count samples, starting at an absolute stream position, out of the
+        # ring buffer and into out, the capture buffer or, failing those, a new array
+        if out is None:
+            out = self._capture
+        if out is None:
+            out = numpy.empty((count, 1), dtype=self._buffer.dtype)
+        size = len(self._buffer)
+        start = position % size
+        split = min(count, size - start)
+        out[:split, 0] = self._buffer[start:start + split]
+        out[split:, 0] = self._buffer[:count - split]
+        return out
+
+
+class NoiseTrigger(object):
+    __slots__ = ('callback', 'level', 'hold', 'start', 'end', 'weighting', 'on_release', 'active', '_since')
+
+    def __init__(self, callback, level, hold=0.0, start=0, end=None, weighting='Z', on_release=None):
+        """Band level threshold watched by a NoiseMonitor.
+
+        :param callback: Called with the band level once it has been at or above level for hold seconds
+        :param level: Threshold, in dB
+        :param hold: Time, in seconds, the band level must stay at or above the threshold
+        :param start: Start frequency (in Hz)
+        :param end: Optional end frequency (in Hz), defaults to the maximum frequency
+        :param weighting: Frequency weighting, one of 'A', 'C' or 'Z' (none)
+        :param on_release: Optional, called with the band level once it falls back below the threshold
+
+        """
+        self.callback = callback
+        self.level = level
+        self.hold = hold
+        self.start = start
+        self.end = end
+        self.weighting = weighting
+        self.on_release = on_release
+        self.active = False
+        self._since = None
+
+    def update(self, spectrum, now):
+        """Check the threshold against a new spectrum.
+
+        :param spectrum: NoiseSpectrum of the most recent audio
+        :param now: Stream time, in seconds, of the end of that audio
+
+        """
+        level = spectrum.get_band_level(self.start, self.end, self.weighting)
+        if level >= self.level:
+            if self._since is None:
+                self._since = now
+            if not self.active and now - self._since >= self.hold:
+                self.active = True
+                self.callback(level)
+        else:
+            self._since = None
+            if self.active:
+                self.active = False
+                if self.on_release is not None:
+                    self.on_release(level)
+
+    def __repr__(self):
+        return "NoiseTrigger(level={}, hold={}, start={}, end={}, weighting={!r}, active={})".format(
+            self.level, self.hold, self.start, self.end, self.weighting, self.active)
+
+    __str__ = __repr__
+
+
+class NoiseMonitor(object):
+    def __init__(self, noise=None, interval=0.05, spectrogram=None):
+        """Continuous noise analysis in a background thread.
+
+        Streams audio into the Noise ring buffer and, every interval seconds,
+        analyses the most recent capture duration of audio. The latest
+        spectrum is published for latest() and wait(), and triggers are
+        checked against it, so callbacks fire within one interval of the
+        hold time being reached rather than after a full capture.
+
+        Use a short capture duration, eg Noise(duration=0.1), for triggers
+        that should respond quickly to the onset of a sound.
+
+        A NoiseSpectrogram, if given, is fed with all streamed audio on the
+        same schedule, ready for rendering with its view().
+
+        While the monitor is running it owns the Noise instance, use the
+        published spectra rather than calling the Noise methods directly.
+
+        An exception raised by an analysis or a trigger callback doesn't stop
+        the monitor, the number raised is counted in errors and the most
+        recent kept in last_error.
+
+        :param noise: Noise instance to analyse, defaults to Noise()
+        :param interval: Time, in seconds, between analyses
+        :param spectrogram: Optional NoiseSpectrogram to keep up to date
+
+        """
+        self.noise = Noise() if noise is None else noise
+        self.interval = interval
+        self.spectrogram = spectrogram
+        self.errors = 0
+        self.last_error = None
+        self._triggers = []
+        self._latest = None
+        self._published = 0
+        self._position = 0
+        self._updated = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self._owns_stream = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exception_type, exception_value, exception_traceback):
+        self.stop()
+
+    def add_trigger(self, callback, level, hold=0.0, start=0, end=None, weighting='Z', on_release=None):
+        """Call back when a band level stays at or above a threshold.
+
+        See NoiseTrigger for details of the arguments.
+
+        Returns the NoiseTrigger, which can be passed to remove_trigger.
+
+        """
+        trigger = NoiseTrigger(callback, level, hold, start, end, weighting, on_release)
+        # Replace rather than append, the worker may be iterating the list
+        self._triggers = self._triggers + [trigger]
+        return trigger
+
+    def remove_trigger(self, trigger):
+        """Stop watching a trigger."""
+        self._triggers = [t for t in self._triggers if t is not trigger]
+
+    def start(self):
+        """Start streaming and analysing in the background."""
+        if self._thread is not None:
+            return
+        self._owns_stream = self.noise._stream is None
+        self.noise.start_stream()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop analysing, and streaming if the monitor started the stream."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        if self._owns_stream:
+            self.noise.stop_stream()
+
+    def latest(self):
+        """Return the most recently published NoiseSpectrum, or None if there isn't one yet."""
+        return self._latest
+
+    def wait(self, timeout=None):
+        """Wait for the next NoiseSpectrum to be published and return it.
+
+        Returns None if timeout seconds pass first.
+
+        :param timeout: Optional time, in seconds, to wait
+
+        """
+        with self._updated:
+            published = self._published
+            self._updated.wait(timeout)
+            if self._published == published:
+                return None
+            return self._latest
+
+    def get_noise_profile(self,
+                          noise_floor=100,
+                          low=0.12,
+                          mid=0.36,
+                          high=None,
+                          timeout=None):
+        """Return the noise profile of the latest spectrum, waiting for one if necessary.
+
+        See NoiseSpectrum.get_noise_profile for details.
+
+        :param timeout: Time, in seconds, to wait for a spectrum, defaults to ten capture durations
+
+        """
+        if timeout is None:
+            timeout = self.noise.duration * 10
+        with self._updated:
+            if self._latest is None:
+                self._updated.wait(timeout)
+            spectrum = self._latest
+        if spectrum is None:
+            raise RuntimeError("Timed out waiting {:.01f}s for a noise spectrum".format(timeout))
+        return spectrum.get_noise_profile(noise_floor, low, mid, high)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._update()
+            except Exception as e:
+                self._error(e)
+
+    def _error(self, error):
+        self.errors += 1
+        self.last_error = error
+
+    def _update(self):
+        noise = self.noise
+        if self.spectrogram is not None:
+            noise.update_spectrogram(self.spectrogram)
+        written, spectrum = noise.latest_spectrum(self._position, copy=True)
+        if spectrum is None:
+            return
+        self._position = written
+        with self._updated:
+            self._latest = spectrum
+            self._published += 1
+            self._updated.notify_all()
+        now = float(written) / noise.sample_rate
+        for trigger in self._triggers:
+            # One failing callback mustn't stop the others
+            try:
+                trigger.update(spectrum, now)
+            except Exception as e:
+                self._error(e)
@@ -0,0 +1,72 @@
+import sys
+import time
+import mock
+import pytest
+from i2cdevice import MockSMBus
+
+
+class SMBusFakeDevice(MockSMBus):
+    def __init__(self, i2c_bus):
+        MockSMBus.__init__(self, i2c_bus)
+        self.regs[0x00:0x01] = 0x0f, 0x00
+
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 5), reason="requires python3.5")
+
+
+def _run(coroutine):
+    import asyncio
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_gas_async_read_all():
+    sys.modules['RPi'] = mock.Mock()
+    sys.modules['RPi.GPIO'] = mock.Mock()
+    smbus = mock.Mock()
+    smbus.SMBus = SMBusFakeDevice
+    sys.modules['smbus'] = smbus
+    from enviroplus import gas, gas_async
+    gas._is_setup = False
+
+    result = _run(gas_async.async_read_all())
+    assert int(result.oxidising) == 16641
+    assert int(result.reducing) == 16727
+    assert int(result.nh3) == 16813
+
+    result = _run(gas_async.async_read(['nh3']))
+    assert result.oxidising is None
+    assert int(result.nh3) == 16813
+
+    gas_async.shutdown()
+
+
+def test_gas_async_readings():
+    sys.modules['RPi'] = mock.Mock()
+    sys.modules['RPi.GPIO'] = mock.Mock()
+    smbus = mock.Mock()
+    smbus.SMBus = SMBusFakeDevice
+    sys.modules['smbus'] = smbus
+    from enviroplus import gas, gas_async
+    gas._is_setup = False
+
+    readings = gas_async.async_readings(0.01)
+    assert readings.__aiter__() is readings
+
+    t_start = gas._monotonic()
+    assert int(_run(readings.__anext__()).oxidising) == 16641
+    assert readings.missed == 0
+
+    # The third reading is due two intervals after the first
+    results = [_run(readings.__anext__()) for _ in range(2)]
+    assert [int(result.oxidising) for result in results] == [16641] * 2
+    assert gas._monotonic() - t_start >= 0.02
+
+    time.sleep(0.055)
+    _run(readings.__anext__())
+    assert readings.missed >= 4
+
+    gas_async.shutdown()
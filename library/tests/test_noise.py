@@ -0,0 +1,487 @@
+import sys
+import time
+import mock
+import numpy
+import pytest
+
+
+def _tone(frequency, sample_rate=16000, duration=0.5, amplitude=0.5):
+    t = numpy.arange(int(sample_rate * duration)) / float(sample_rate)
+    return (numpy.sin(2 * numpy.pi * frequency * t) * amplitude).reshape(-1, 1)
+
+
+def test_noise_setup():
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+    noise = noise_module.Noise()
+    assert noise.sample_rate == 16000
+
+
+def test_noise_profile():
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+    with mock.patch.object(noise_module, 'sounddevice') as sounddevice:
+        sounddevice.rec.return_value = _tone(2000)
+        noise = noise_module.Noise()
+
+        low, mid, high, amp = noise.get_noise_profile()
+        assert mid > low and mid > high
+
+        amps = noise.get_amplitudes_at_frequency_ranges([(100, 200), (1900, 2100)])
+        assert amps[1] > amps[0]
+
+        with pytest.raises(ValueError):
+            noise.get_amplitude_at_frequency_range(0, 9000)
+
+
+def test_noise_stream():
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+    with mock.patch.object(noise_module, 'sounddevice') as sounddevice:
+        noise = noise_module.Noise(duration=0.5)
+        with pytest.raises(RuntimeError):
+            noise.latest_spectrum()
+
+        with noise:
+            callback = sounddevice.InputStream.call_args[1]['callback']
+            sounddevice.InputStream.return_value.start.assert_called_once_with()
+            assert noise.latest_spectrum() == (0, None)
+
+            tone = _tone(1000, duration=1.25)
+            for offset in range(0, len(tone), 1024):
+                block = tone[offset:offset + 1024]
+                callback(block, len(block), None, None)
+
+            recording = noise._record()
+            assert recording.shape == (8000, 1)
+            assert (recording[:, 0] == tone[-8000:, 0]).all()
+            assert not sounddevice.rec.called
+
+            position, spectrum = noise.latest_spectrum()
+            assert position == len(tone)
+            assert spectrum.get_peak_frequency()[0] == 1000.0
+            assert noise.latest_spectrum(position) == (position, None)
+
+        sounddevice.InputStream.return_value.close.assert_called_once_with()
+        assert noise._stream is None
+
+
+def test_noise_analyse():
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+    with mock.patch.object(noise_module, 'sounddevice') as sounddevice:
+        sounddevice.rec.return_value = _tone(2000) + _tone(440, amplitude=0.25)
+        noise = noise_module.Noise()
+
+        spectrum = noise.analyse()
+        assert sounddevice.rec.call_count == 1
+
+        low, mid, high, amp = spectrum.get_noise_profile()
+        amps = spectrum.get_amplitudes_at_frequency_ranges([(430, 450), (1990, 2010)])
+        assert amps[1] > amps[0] > 0
+        assert spectrum.get_amplitude_at_frequency_range(1990, 2010) == amps[1]
+        assert spectrum.get_peak_frequency()[0] == 2000
+        assert spectrum.get_peak_frequency(0, 1000)[0] == 440
+        assert sounddevice.rec.call_count == 1
+
+
+def test_noise_fft_size():
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+    with mock.patch.object(noise_module, 'sounddevice') as sounddevice:
+        sounddevice.rec.return_value = _tone(2000)
+
+        assert noise_module.Noise().fft_size == 16000
+        assert noise_module.Noise(fft_size='native').fft_size == 8000
+        assert noise_module.Noise(fft_size=4096).fft_size == 4096
+
+        noise = noise_module.Noise(fft_size='pow2')
+        assert noise.fft_size == 8192
+
+        spectrum = noise.analyse()
+        assert len(spectrum.magnitude) == 4097
+        assert spectrum.frequencies[1024] == 2000.0
+        assert spectrum.get_peak_frequency()[0] == 2000.0
+
+        low, mid, high, amp = spectrum.get_noise_profile()
+        assert mid > low and mid > high
+
+        with pytest.raises(ValueError):
+            noise_module.Noise(fft_size='fast')
+
+
+def test_noise_welch():
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+    with mock.patch.object(noise_module, 'sounddevice') as sounddevice:
+        sounddevice.rec.return_value = _tone(2000)
+
+        noise = noise_module.Noise(estimator='welch', segment_size=512, overlap=0.5)
+        assert noise.fft_size == 512
+
+        spectrum = noise.analyse()
+        assert len(spectrum.magnitude) == 257
+        assert spectrum.hz_per_bin == 31.25
+        assert spectrum.get_peak_frequency()[0] == 2000.0
+
+        samples = numpy.arange(10, dtype=numpy.float64)
+        frames = noise_module._frames(samples, 4, 2)
+        assert frames.shape == (4, 4)
+        assert frames[3].tolist() == [6, 7, 8, 9]
+        assert numpy.shares_memory(frames, samples)
+
+        with pytest.raises(ValueError):
+            noise_module.Noise(estimator='welch', segment_size=16000)
+        with pytest.raises(ValueError):
+            noise_module.Noise(estimator='welch', overlap=1.0)
+        with pytest.raises(ValueError):
+            noise_module.Noise(estimator='median')
+
+
+def test_noise_band_index():
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+
+    magnitude = numpy.random.uniform(0, 1, 8001)
+    spectrum = noise_module.NoiseSpectrum(magnitude, 16000)
+
+    ranges = numpy.array([(0, 10), (100, 200), (1000, 1001), (7990, 9000), (50, 50)])
+    result = spectrum.get_amplitudes_at_frequency_ranges(ranges)
+    assert isinstance(result, numpy.ndarray)
+    expected = [magnitude[0:10].mean(), magnitude[100:200].mean(), magnitude[1000], magnitude[7990:].mean()]
+    assert numpy.allclose(result[:4], expected)
+    assert numpy.isnan(result[4])
+
+    result = spectrum.get_amplitudes_at_frequency_ranges([(100, 200)])
+    assert isinstance(result, list)
+    assert numpy.isclose(result[0], magnitude[100:200].mean())
+    assert numpy.isclose(spectrum.get_amplitude_at_frequency_range(100, 200), magnitude[100:200].mean())
+
+
+def test_noise_level():
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+    with mock.patch.object(noise_module, 'sounddevice') as sounddevice:
+        sounddevice.rec.return_value = _tone(1000, amplitude=1.0)
+
+        # A full scale sine has a mean square of 0.5, or -3.01dBFS
+        for kwargs in ({}, {'fft_size': 'pow2'}, {'estimator': 'welch'}):
+            noise = noise_module.Noise(**kwargs)
+            assert abs(noise.get_level('Z') - -3.01) < 0.05
+            assert abs(noise.get_level('A') - -3.01) < 0.05
+            assert abs(noise.get_level('C') - -3.01) < 0.05
+
+        noise = noise_module.Noise(calibration=120)
+        assert abs(noise.get_level() - 116.99) < 0.05
+
+        # A-weighting attenuates 100Hz by around 19dB
+        sounddevice.rec.return_value = _tone(100, amplitude=1.0)
+        assert abs(noise.get_level('A') - (116.99 - 19.1)) < 0.2
+
+        with pytest.raises(ValueError):
+            noise.get_level('B')
+
+        weighting = noise_module._weighting('A', 16000, 16000, 8001)
+        assert noise_module._weighting('A', 16000, 16000, 8001) is weighting
+
+
+def test_noise_level_stats():
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+
+    stats = noise_module.NoiseLevelStats()
+    for _ in range(8):
+        stats.update(60.0, 1.0)
+    for _ in range(2):
+        stats.update(70.0, 1.0)
+
+    assert abs(stats.leq - 10 * numpy.log10((8 * 1e6 + 2 * 1e7) / 10.0)) < 1e-9
+    assert stats.lmax == 70.0
+    assert abs(stats.l10 - 70.0) < 1e-9
+    assert abs(stats.l90 - 60.0) < 1e-9
+    assert 'Leq' in str(stats)
+
+    stats.reset()
+    assert stats.duration == 0
+
+
+def test_noise_level_stats_stream():
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+    with mock.patch.object(noise_module, 'sounddevice') as sounddevice:
+        noise = noise_module.Noise(duration=0.5)
+        stats = noise_module.NoiseLevelStats()
+        with noise:
+            callback = sounddevice.InputStream.call_args[1]['callback']
+            tone = _tone(1000, duration=1.25, amplitude=1.0)
+            for offset in range(0, len(tone), 1000):
+                block = tone[offset:offset + 1000]
+                callback(block, len(block), None, None)
+
+            # The ring holds 1s, the first 0.75s has been or is about to be overwritten
+            noise.update_level_stats(stats, 'Z')
+            assert stats.duration == 0.5
+            assert noise._consumed == len(tone)
+
+            noise.update_level_stats(stats, 'Z')
+            assert stats.duration == 0.5
+
+            callback(tone[:8000], 8000, None, None)
+            noise.update_level_stats(stats, 'Z')
+            assert stats.duration == 1.0
+
+        assert abs(stats.leq - -3.01) < 0.05
+
+
+@pytest.mark.parametrize('dtype', ['float64', 'int16'])
+def test_noise_level_stats_silence(dtype):
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+    with mock.patch.object(noise_module, 'sounddevice') as sounddevice:
+        sounddevice.rec.side_effect = _fake_rec(numpy.zeros((8000, 1)))
+        noise = noise_module.Noise(dtype=dtype)
+        stats = noise_module.NoiseLevelStats()
+
+        noise.update_level_stats(stats, 'Z')
+        assert stats.duration == 0.5
+        assert numpy.isneginf(stats.leq)
+        assert numpy.isneginf(stats.lmax)
+        assert stats.l90 == stats.minimum
+
+        stats.update(60.0, 0.5)
+        assert abs(stats.leq - (60.0 - 10 * numpy.log10(2))) < 1e-9
+        assert abs(stats.l10 - 60.0) < 1e-9
+
+
+def test_noise_octave_bands():
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+    with mock.patch.object(noise_module, 'sounddevice') as sounddevice:
+        sounddevice.rec.return_value = _tone(1000, amplitude=1.0)
+        noise = noise_module.Noise()
+
+        centres, levels = noise.get_octave_bands()
+        assert numpy.round(centres).tolist() == [32, 63, 126, 251, 501, 1000, 1995, 3981]
+        assert numpy.argmax(levels) == 5
+        assert abs(levels[5] - -3.01) < 0.05
+
+        spectrum = noise.analyse()
+        centres, levels = spectrum.get_octave_bands(3)
+        assert len(centres) == 26
+        assert round(centres[0]) == 20
+        assert centres[numpy.argmax(levels)] == 1000.0
+
+        bank = noise_module._filter_bank(3, 20.0, 16000, 16000, 8001)
+        spectrum.get_octave_bands(3)
+        assert noise_module._filter_bank(3, 20.0, 16000, 16000, 8001) is bank
+
+        centres, levels = noise_module.Noise(estimator='welch', segment_size=256).get_octave_bands(3)
+        assert numpy.isneginf(levels[0])
+
+
+def _fake_rec(recording):
+    def rec(frames=None, samplerate=None, channels=None, dtype=None, out=None, blocking=False):
+        if out is None:
+            return recording.astype(dtype)
+        if out.dtype == numpy.int16:
+            out[:] = recording * 32767
+        else:
+            out[:] = recording
+        return out
+    return rec
+
+
+@pytest.mark.parametrize('dtype', ['float32', 'int16'])
+@pytest.mark.parametrize('estimator', ['fft', 'welch'])
+def test_noise_low_footprint(dtype, estimator):
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+    with mock.patch.object(noise_module, 'sounddevice') as sounddevice:
+        sounddevice.rec.side_effect = _fake_rec(_tone(1000, amplitude=1.0))
+        noise = noise_module.Noise(dtype=dtype, estimator=estimator)
+
+        first = noise.analyse()
+        assert sounddevice.rec.call_args[1]['out'] is noise._capture
+        assert first.magnitude.dtype == numpy.float32
+        assert first.get_peak_frequency()[0] == 1000.0
+        assert abs(first.get_level('Z') - -3.01) < 0.05
+
+        low, mid, high, amp = first.get_noise_profile()
+        assert low > mid and low > high
+
+        second = noise.analyse()
+        assert second.magnitude is first.magnitude
+        assert second.get_noise_profile()[0] == low
+        assert second._cumulative is noise._cumulative
+
+        with noise:
+            callback = sounddevice.InputStream.call_args[1]['callback']
+            assert sounddevice.InputStream.call_args[1]['dtype'] == dtype
+            block = noise._capture.copy()
+            callback(block, len(block), None, None)
+            assert noise._record() is noise._capture
+            assert noise.analyse().get_peak_frequency()[0] == 1000.0
+
+    with pytest.raises(ValueError):
+        noise_module.Noise(dtype='int8')
+
+
+@pytest.mark.parametrize('dtype', ['float64', 'float32'])
+def test_noise_monitor_trigger(dtype):
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+    with mock.patch.object(noise_module, 'sounddevice') as sounddevice:
+        monitor = noise_module.NoiseMonitor(noise_module.Noise(duration=0.1, dtype=dtype))
+        onset = mock.Mock()
+        release = mock.Mock()
+        trigger = monitor.add_trigger(onset, -20.0, hold=0.05, start=1000, end=3000, on_release=release)
+        assert monitor.latest() is None
+
+        monitor.noise.start_stream()
+        callback = sounddevice.InputStream.call_args[1]['callback']
+
+        def feed(samples):
+            for offset in range(0, len(samples), 160):
+                callback(samples[offset:offset + 160], 160, None, None)
+                monitor._update()
+
+        feed(numpy.zeros((1600, 1), dtype=dtype))
+        assert numpy.isneginf(monitor.latest().get_band_level(1000, 3000))
+        assert not onset.called
+
+        tone = _tone(2000, duration=0.1).astype(dtype)
+        feed(tone[:480])
+        assert not onset.called
+        feed(tone[480:])
+        onset.assert_called_once_with(mock.ANY)
+        assert trigger.active
+        assert abs(monitor.latest().get_band_level(1000, 3000) - -9.03) < 0.1
+        assert monitor.latest().get_band_level(100, 500) < -40
+
+        feed(numpy.zeros((1600, 1), dtype=dtype))
+        assert onset.call_count == 1
+        release.assert_called_once_with(float('-inf'))
+        assert not trigger.active
+
+        monitor.remove_trigger(trigger)
+        feed(tone)
+        assert onset.call_count == 1
+
+
+def test_noise_monitor_thread():
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+    with mock.patch.object(noise_module, 'sounddevice') as sounddevice:
+        spectrogram = noise_module.NoiseSpectrogram()
+        monitor = noise_module.NoiseMonitor(noise_module.Noise(duration=0.1), interval=0.01, spectrogram=spectrogram)
+        with monitor:
+            callback = sounddevice.InputStream.call_args[1]['callback']
+            callback(_tone(2000, duration=0.1), 1600, None, None)
+            low, mid, high, amp = monitor.get_noise_profile()
+            assert mid > low and mid > high
+            assert len(spectrogram) == 6
+            # No new audio, so nothing new is published
+            assert monitor.wait(0.05) is None
+
+            # A failing callback is counted, and neither it nor the worker stop
+            failing = monitor.add_trigger(mock.Mock(side_effect=ValueError('oops')), -100.0)
+            working = monitor.add_trigger(mock.Mock(), -100.0)
+            callback(_tone(2000, duration=0.01), 160, None, None)
+            t_start = time.time()
+            while not working.callback.called and time.time() - t_start < 5.0:
+                time.sleep(0.01)
+            working.callback.assert_called_once_with(mock.ANY)
+            assert monitor.errors == 1
+            assert isinstance(monitor.last_error, ValueError)
+            assert failing.active
+
+            previous = monitor.latest()
+            callback(_tone(2000, duration=0.01), 160, None, None)
+            t_start = time.time()
+            while monitor.latest() is previous and time.time() - t_start < 5.0:
+                time.sleep(0.01)
+            assert monitor.latest() is not previous
+            assert monitor._thread.is_alive()
+        sounddevice.InputStream.return_value.close.assert_called_once_with()
+        assert monitor.noise._stream is None
+
+        # Never started, so no spectrum will arrive
+        with pytest.raises(RuntimeError):
+            noise_module.NoiseMonitor(noise_module.Noise(duration=0.01)).get_noise_profile()
+
+
+@pytest.mark.parametrize('dtype', ['uint8', 'float16'])
+def test_noise_spectrogram(dtype):
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+    spectrogram = noise_module.NoiseSpectrogram(frames=8, frame_size=256, dtype=dtype)
+    assert spectrogram.view().shape == (0, 129)
+    assert spectrogram.frequencies[32] == 2000.0
+
+    spectrogram.append(_tone(2000, duration=0.1)[:, 0])
+    assert len(spectrogram) == 6
+    levels = spectrogram.export(decibels=True)
+    assert levels.dtype == numpy.float32
+    assert (levels.argmax(axis=1) == 32).all()
+    # Bin powers sum to the -9.03dB of the tone
+    total = 10 * numpy.log10(numpy.sum(10 ** (levels / 10.0), axis=1))
+    assert numpy.allclose(total, -9.03, atol=0.5)
+
+    # Silence wraps the ring and pushes the tone out, in order
+    spectrogram.append(numpy.zeros(256 * 4, dtype=numpy.int16))
+    view = spectrogram.view()
+    assert view.shape == (8, 129)
+    assert view.dtype == numpy.dtype(dtype)
+    assert numpy.shares_memory(view, spectrogram._data)
+    assert not view.flags.writeable
+    assert (view[:4].argmax(axis=1) == 32).all()
+    assert (spectrogram.export(decibels=True)[4:] == -100.0).all()
+    assert spectrogram._data.nbytes == 2 * 8 * 129 * numpy.dtype(dtype).itemsize
+
+    spectrogram.reset()
+    assert len(spectrogram) == 0
+
+    with pytest.raises(ValueError):
+        noise_module.NoiseSpectrogram(dtype='float32')
+
+
+def test_noise_spectrogram_stream():
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+    with mock.patch.object(noise_module, 'sounddevice') as sounddevice:
+        tone = _tone(2000, duration=0.25) + _tone(500, duration=0.25) * numpy.linspace(0, 1, 4000).reshape(-1, 1)
+        expected = noise_module.NoiseSpectrogram(frames=32, hop=128)
+        expected.append(tone[:, 0])
+
+        spectrogram = noise_module.NoiseSpectrogram(frames=32, hop=128)
+        noise = noise_module.Noise(duration=0.1)
+        with noise:
+            callback = sounddevice.InputStream.call_args[1]['callback']
+            for offset in range(0, len(tone), 100):
+                callback(tone[offset:offset + 100], 100, None, None)
+                noise.update_spectrogram(spectrogram)
+
+        assert len(spectrogram) == 30
+        assert spectrogram.position == 30 * 128
+        assert (spectrogram.export() == expected.export()).all()
+
+        with pytest.raises(ValueError):
+            noise.update_spectrogram(noise_module.NoiseSpectrogram(sample_rate=8000))
+
+
+def test_noise_spectrogram_stream_behind():
+    sys.modules['sounddevice'] = mock.Mock()
+    from enviroplus import noise as noise_module
+    with mock.patch.object(noise_module, 'sounddevice') as sounddevice:
+        tone = _tone(2000, duration=0.5)
+        spectrogram = noise_module.NoiseSpectrogram(frames=32, hop=128)
+        noise = noise_module.Noise(duration=0.1)
+        with noise:
+            callback = sounddevice.InputStream.call_args[1]['callback']
+            callback(tone, len(tone), None, None)
+            noise.update_spectrogram(spectrogram)
+
+        # Frames start a capture (1600 samples) ahead of the slot written next
+        start = len(tone) - len(noise._buffer) + 1600
+        assert len(spectrogram) == (1600 - 256) // 128 + 1
+        assert spectrogram.position == start + len(spectrogram) * 128
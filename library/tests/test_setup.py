@@ -1,5 +1,8 @@
 import sys
+import time
 import mock
+import numpy
+import pytest
 from i2cdevice import MockSMBus
 
 
@@ -96,3 +99,369 @@ def test_gas_read_adc_str():
     gas.enable_adc(True)
     gas.set_adc_gain(2.048)
     assert 'ADC' in str(gas.read_all())
+
+
+def test_gas_read_all_scan_mode():
+    sys.modules['RPi'] = mock.Mock()
+    sys.modules['RPi.GPIO'] = mock.Mock()
+    smbus = mock.Mock()
+    smbus.SMBus = SMBusFakeDevice
+    sys.modules['smbus'] = smbus
+    from enviroplus import gas
+    gas._is_setup = False
+
+    gas.enable_adc(True)
+    gas.set_adc_gain(2.048)
+    gas.enable_scan_mode(True)
+    try:
+        result = gas.read_all()
+        assert gas.adc.get_mode() == 'continuous'
+        assert gas.adc.get_programmable_gain() == gas.MICS6814_GAIN
+    finally:
+        gas.enable_scan_mode(False)
+        gas.enable_adc(False)
+
+    assert isinstance(result.oxidising, float)
+    assert int(result.oxidising) == 15962
+    assert int(result.reducing) == 16046
+    assert int(result.nh3) == 16131
+    assert result.adc == 0.247
+
+    timing = gas.get_scan_timing()
+    assert [name for name, duration in timing.channels] == ['oxidising', 'reducing', 'nh3', 'adc']
+    assert abs(timing.total - sum(duration for name, duration in timing.channels)) < 1e-6
+    assert 'Total' in str(timing)
+    assert gas.adc.get_mode() == 'single'
+
+    # The second new result is the first on the new channel
+    with mock.patch.object(gas.adc, 'get_conversion_value', side_effect=[100, 100, 200, 200, 300, 999]) as value:
+        assert gas._scan_voltage(gas.MICS6814_CHANNELS['oxidising'], 2.048) == 300 / 2048.0 * 2.048
+        assert value.call_count == 5
+
+    # A result that repeats the last can't be spotted, so give up after the worst case
+    t_start = time.time()
+    with mock.patch.object(gas.adc, 'get_conversion_value', return_value=100):
+        assert gas._scan_voltage(gas.MICS6814_CHANNELS['oxidising'], 2.048) == 100 / 2048.0 * 2.048
+    assert time.time() - t_start >= gas._scan_settle_time
+
+
+def test_gas_read_batch():
+    sys.modules['RPi'] = mock.Mock()
+    sys.modules['RPi.GPIO'] = mock.Mock()
+    smbus = mock.Mock()
+    smbus.SMBus = SMBusFakeDevice
+    sys.modules['smbus'] = smbus
+    from enviroplus import gas
+    gas._is_setup = False
+    gas.setup()
+
+    gas.enable_adc(True)
+    gas.set_adc_gain(2.048)
+    with mock.patch.object(gas.adc, 'set_programmable_gain', wraps=gas.adc.set_programmable_gain) as set_gain:
+        try:
+            readings = gas.read_batch(5)
+        finally:
+            gas.enable_adc(False)
+
+    assert set_gain.call_count == 2
+    assert gas.adc.get_programmable_gain() == gas.MICS6814_GAIN
+    assert len(readings) == 5
+    for result in readings:
+        assert int(result.oxidising) == 16641
+        assert int(result.reducing) == 16727
+        assert int(result.nh3) == 16813
+        assert result.adc == 0.255
+
+
+def test_gas_read_channels():
+    sys.modules['RPi'] = mock.Mock()
+    sys.modules['RPi.GPIO'] = mock.Mock()
+    smbus = mock.Mock()
+    smbus.SMBus = SMBusFakeDevice
+    sys.modules['smbus'] = smbus
+    from enviroplus import gas
+    gas._is_setup = False
+    gas.setup()
+
+    with mock.patch.object(gas.adc, 'set_multiplexer', wraps=gas.adc.set_multiplexer) as set_multiplexer:
+        result = gas.read(['nh3', 'oxidising'])
+        assert set_multiplexer.call_count == 2
+
+        assert int(gas.read_nh3()) == 16813
+        assert set_multiplexer.call_count == 3
+
+    assert int(result.oxidising) == 16641
+    assert result.reducing is None
+    assert int(result.nh3) == 16813
+    assert result.adc is None
+    assert "Reducing" not in str(result)
+
+    with pytest.raises(ValueError):
+        gas.read(['co2'])
+
+
+def test_gas_sample():
+    sys.modules['RPi'] = mock.Mock()
+    sys.modules['RPi.GPIO'] = mock.Mock()
+    smbus = mock.Mock()
+    smbus.SMBus = SMBusFakeDevice
+    sys.modules['smbus'] = smbus
+    from enviroplus import gas
+    gas._is_setup = False
+
+    result = gas.sample(samples=10)
+
+    assert len(result) == 10
+    assert result.data.dtype == gas.MICS6814_SAMPLE_DTYPE
+    assert (result.data['oxidising'].astype(int) == 16641).all()
+    assert (result.data['nh3'].astype(int) == 16813).all()
+    assert numpy.isnan(result.data['adc']).all()
+    assert (numpy.diff(result.data['timestamp']) >= 0).all()
+    assert result.sample_rate > 0
+
+    result = gas.sample(duration=0.01)
+    assert len(result) > 0
+    assert result.data['timestamp'][-1] - result.data['timestamp'][0] < 0.01
+
+    with pytest.raises(ValueError):
+        gas.sample()
+
+
+def test_gas_voltage_to_resistance():
+    sys.modules['RPi'] = mock.Mock()
+    sys.modules['RPi.GPIO'] = mock.Mock()
+    smbus = mock.Mock()
+    smbus.SMBus = SMBusFakeDevice
+    sys.modules['smbus'] = smbus
+    from enviroplus import gas
+
+    assert isinstance(gas.voltage_to_resistance(0.756), float)
+    assert int(gas.voltage_to_resistance(0.756)) == 16641
+    assert gas.voltage_to_resistance(3.3) == 0
+
+    result = gas.voltage_to_resistance(numpy.array([0.756, 3.3, 0.0]))
+    assert result.astype(int).tolist() == [16641, 0, 0]
+
+    result = gas.voltage_to_resistance(numpy.array([1.0, 5.0]), load_resistance=10000, supply_voltage=5.0)
+    assert result.tolist() == [2500.0, 0.0]
+
+
+def test_gas_background():
+    sys.modules['RPi'] = mock.Mock()
+    sys.modules['RPi.GPIO'] = mock.Mock()
+    smbus = mock.Mock()
+    smbus.SMBus = SMBusFakeDevice
+    sys.modules['smbus'] = smbus
+    from enviroplus import gas
+    gas._is_setup = False
+
+    with pytest.raises(RuntimeError):
+        gas.latest()
+    with pytest.raises(RuntimeError):
+        gas.background_status()
+
+    gas.start_background(rate=500, history=1.0)
+    try:
+        t_start = time.time()
+        while len(gas.window(1.0)) < 5 and time.time() - t_start < 5.0:
+            time.sleep(0.01)
+
+        result = gas.latest()
+        assert int(result.oxidising) == 16641
+        assert int(result.nh3) == 16813
+        assert result.adc is None
+
+        data = gas.window(1.0)
+        assert len(data) >= 5
+        assert (numpy.diff(data['timestamp']) >= 0).all()
+
+        status = gas.background_status()
+        assert status.running
+        assert status.errors == 0
+        assert status.last_reading_time == data['timestamp'][-1]
+
+        # A failed reading is counted and sampling carries on
+        error = IOError(121, 'Remote I/O error')
+        with mock.patch.object(gas, 'read', side_effect=[error] + [gas.read()] * 1000):
+            t_start = time.time()
+            while gas.background_status().readings <= status.readings + 2 and time.time() - t_start < 5.0:
+                time.sleep(0.01)
+        status = gas.background_status()
+        assert status.running
+        assert status.errors == 1
+        assert status.last_error is error
+        assert status.readings >= 5
+    finally:
+        gas.cleanup()
+
+    assert gas._background is None
+    gas.GPIO.output.assert_called_with(gas.MICS6814_HEATER_PIN, 0)
+
+
+def test_gas_background_ring():
+    sys.modules['RPi'] = mock.Mock()
+    sys.modules['RPi.GPIO'] = mock.Mock()
+    from enviroplus import gas
+
+    # A single row would leave latest() reading the row being written
+    assert len(gas._BackgroundSampler(1.0, 0.5)._data) == 2
+
+    sampler = gas._BackgroundSampler(1.0, 4.0)
+    size = len(sampler._data)
+    now = time.time()
+    for count in range(1, 3 * size):
+        sampler._data[(count - 1) % size] = (now - 100 + count, count, count, count, 0.0)
+        sampler._count = count
+        # The slot written next holds the oldest row, it is never read
+        sampler._data[count % size]['oxidising'] = -1
+        data = sampler.window(1000.0)
+        expected = list(range(max(1, count - size + 2), count + 1))
+        assert data['oxidising'].tolist() == expected
+        assert sampler.latest().oxidising == count
+
+
+def test_gas_readings():
+    sys.modules['RPi'] = mock.Mock()
+    sys.modules['RPi.GPIO'] = mock.Mock()
+    smbus = mock.Mock()
+    smbus.SMBus = SMBusFakeDevice
+    sys.modules['smbus'] = smbus
+    from enviroplus import gas
+    gas._is_setup = False
+
+    readings = gas.readings(0.01)
+    t_start = gas._monotonic()
+    assert int(next(readings).oxidising) == 16641
+    assert readings.missed == 0
+
+    # The third reading is due two intervals after the first
+    next(readings)
+    next(readings)
+    assert gas._monotonic() - t_start >= 0.02
+
+    time.sleep(0.055)
+    next(readings)
+    assert readings.missed >= 4
+
+
+def test_gas_stability():
+    sys.modules['RPi'] = mock.Mock()
+    sys.modules['RPi.GPIO'] = mock.Mock()
+    smbus = mock.Mock()
+    smbus.SMBus = SMBusFakeDevice
+    sys.modules['smbus'] = smbus
+    from enviroplus import gas
+    gas._is_setup = False
+    gas.setup()
+
+    assert gas.get_heater_on_time() is not None
+
+    # Step a fake monotonic clock, so a busy machine can't age readings out early
+    clock = [gas._monotonic()]
+    with mock.patch.object(gas, '_monotonic', lambda: clock[0]):
+        gas.set_stability(window=0.05, threshold=0.01, warmup=0.0)
+        # A burst is a single point in time, however many readings it holds
+        gas.read_batch(30)
+        assert not gas.is_stable()
+
+        for _ in range(6):
+            gas.read_all()
+            clock[0] += 0.01
+        assert gas.is_stable()
+
+        # Readings expire once they are older than the window
+        clock[0] += 0.06
+        assert not gas.is_stable()
+
+        # Paced, settled readings still aren't stable until the heater has warmed up
+        gas.set_stability(window=0.05, threshold=0.01, warmup=60.0)
+        for _ in range(6):
+            gas.read_all()
+            clock[0] += 0.01
+        assert not gas.is_stable()
+
+        # Warm-up ignores the wall clock, which NTP may step forward soon after boot
+        wall_clock = time.time() + 3600
+        with mock.patch.object(gas.time, 'time', return_value=wall_clock):
+            assert not gas.is_stable()
+
+    gas.set_stability(window=0.05, threshold=0.01, warmup=0.0)
+    assert not gas.is_stable()
+    assert gas.wait_until_stable(timeout=5.0, interval=0.01)
+
+    gas.cleanup()
+    assert gas.get_heater_on_time() is None
+    assert not gas.is_stable()
+
+    gas.set_stability()
+
+
+def test_gas_stability_tracker():
+    sys.modules['RPi'] = mock.Mock()
+    sys.modules['RPi.GPIO'] = mock.Mock()
+    smbus = mock.Mock()
+    smbus.SMBus = SMBusFakeDevice
+    sys.modules['smbus'] = smbus
+    from enviroplus import gas
+
+    tracker = gas._StabilityTracker(9.5, 0.01, 0.0)
+    values = numpy.linspace(10000, 20000, 50)
+    for t, value in enumerate(values):
+        tracker.update((value, value * 2, 1000.0), t)
+
+    assert len(tracker._values) == 10
+    assert abs(tracker._mean[0] - values[-10:].mean()) < 1e-6
+    assert abs(tracker._m2[1] / 9 - (values[-10:] * 2).var(ddof=1)) < 1e-3
+    assert not tracker.is_stable(49)
+
+    for t in range(50, 60):
+        tracker.update((20000.0, 40000.0, 1000.0), t)
+    assert tracker.is_stable(59)
+    assert abs(tracker._mean[0] - 20000.0) < 1e-6
+
+    # Once every reading has expired the tracker starts again from empty
+    assert not tracker.is_stable(100)
+    assert len(tracker._values) == 0 and tracker._mean == [0.0, 0.0, 0.0]
+
+
+def test_gas_duty_cycle():
+    sys.modules['RPi'] = mock.Mock()
+    sys.modules['RPi.GPIO'] = mock.Mock()
+    smbus = mock.Mock()
+    smbus.SMBus = SMBusFakeDevice
+    sys.modules['smbus'] = smbus
+    from enviroplus import gas
+    gas._is_setup = False
+    gas.set_stability(window=0.003, threshold=0.01, warmup=0.0)
+
+    cycle = gas.duty_cycle(burst=4, off_time=0.05, warmup_timeout=1.0, interval=0.001)
+    try:
+        t_start = gas._monotonic()
+        readings = next(cycle)
+        assert len(readings) == 4
+        assert int(readings[0].oxidising) == 16641
+        assert gas.get_heater_on_time() is None
+        gas.GPIO.output.assert_called_with(gas.MICS6814_HEATER_PIN, 0)
+
+        # The first cycle counts the off time that follows it
+        on = cycle.stats.heater_on
+        assert 0 < on <= gas._monotonic() - t_start
+        assert cycle.stats.elapsed == on + 0.05
+        assert cycle.stats.heater_on_fraction == on / (on + 0.05)
+
+        # A consumer slower than off_time lengthens the off period
+        time.sleep(0.08)
+        next(cycle)
+        t_end = gas._monotonic()
+    finally:
+        gas.set_stability()
+
+    assert cycle.stats.cycles == 2
+    assert cycle.stats.unstable == 0
+    # Both cycles' on time and off time, and at least the 0.03s overrun, but no more than has passed
+    assert cycle.stats.heater_on + 0.1 + 0.029 <= cycle.stats.elapsed <= t_end - t_start + 0.05
+    assert cycle.stats.heater_on_fraction == cycle.stats.heater_on / cycle.stats.elapsed
+    assert 'Heater on' in str(cycle.stats)
+
+    gas.enable_heater()
+    assert gas.get_heater_on_time() is not None